@@ -6,77 +6,12 @@ import numpy as np
 import pandas as pd
 import pytz
 import ta
-from _odd.run_backtesting8 import sumprofit
 
 from backtesting import pltbalance, pltchart
-from backtesting.transaction import Transaction
-from run_backtesting8 import simplifyorders
-from strategy import Side
+from backtesting.orders import simplifyorders, sumprofit
 from strategy.mt5_client import MT5Client
 
 
-def trades_todataframe(trades: list[Transaction]):
-    data = [item.todict() for item in trades]
-
-    if not data:
-        return pd.DataFrame()
-
-    df = pd.DataFrame(
-        data=data,
-        columns=data[0].keys())
-
-    df.index = df['entry_time']
-    df.drop(columns=['entry_time'], inplace=True)
-
-    df['balance'] = df['pips'].cumsum()
-
-    return df
-
-
-def tradesexec(chart: pd.DataFrame, slippage=0):
-    trades = []
-    histbar = []
-
-    for i, bar in chart.iterrows():
-        histbar.append(bar.copy())
-
-        if len(histbar) < 3:
-            continue
-        else:
-            histbar = histbar[-3:]
-
-        lasttrade = trades[-1] if trades else None
-
-        issell = bar['sell']
-        isbuy = bar['buy']
-
-        price = 'open'
-
-        if lasttrade and lasttrade.is_open:
-            if lasttrade.side == Side.BUY and issell:
-                lasttrade.close(i, bar[price], slippage)
-            elif lasttrade.side == Side.SELL and isbuy:
-                lasttrade.close(i, bar[price], slippage)
-            else:
-                continue
-
-        if isbuy:
-            trades.append(Transaction(
-                Side.BUY, i, bar[price], slippage))
-            continue
-
-        elif issell:
-            trades.append(Transaction(
-                Side.SELL, i, bar[price], slippage))
-            continue
-
-    lasttrade = trades[-1] if trades else None
-    if lasttrade and lasttrade.is_open:
-        lasttrade.close(chart.iloc[-1].name, chart.iloc[-1]['close'])
-
-    return trades_todataframe(trades)
-
-
 def main():
     logging.basicConfig(
         level=logging.INFO,
@@ -7,29 +7,11 @@ import pytz
 
 from backtesting import pltbalance, pltchart
 from backtesting.data import Data
-from backtesting.transaction import Transaction
+from backtesting.ledger import Ledger
 
 from strategy import Side
 
 
-def tradestodataframe(trades: list[Transaction]):
-    data = [item.todict() for item in trades]
-
-    if not data:
-        return pd.DataFrame()
-
-    df = pd.DataFrame(
-        data=data,
-        columns=data[0].keys())
-
-    df.index = df['entry_time']
-    df.drop(columns=['entry_time'], inplace=True)
-
-    df['balance'] = df['pips'].cumsum()
-
-    return df
-
-
 def tradesexec(ticks: pd.DataFrame, chart: pd.DataFrame, slippage=0):
     trades = []
     histbar = []
@@ -55,7 +37,7 @@ def tradesexec(ticks: pd.DataFrame, chart: pd.DataFrame, slippage=0):
 
     closelasttrade(chart, trades)
 
-    return tradestodataframe(trades)
+    return Ledger.fromtransactions(trades).todataframe()
 
 
 def closelasttrade(chart, trades):
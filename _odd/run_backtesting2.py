@@ -8,76 +8,16 @@ import pytz
 from pandas.plotting import register_matplotlib_converters
 from ta.volatility import AverageTrueRange, KeltnerChannel
 
-from advisor.timeframesignal import Side
+from backtesting.engine import Engine
+from backtesting.signal import SmaSignal
 from backtesting.tradingsimulate import TradingSimulate
+from strategy import Side
 from strategy.mt5_client import MT5Client
 from run_backtesting1 import plt_balance
 
 register_matplotlib_converters()
 
 
-class SmaSignal:
-    def __init__(self):
-        pass
-
-    def apply(self, item: pd.Series) -> Side:
-        sma_count = int(item['sma_count'])
-
-        if not sma_count > 0:
-            return None
-
-        buy_signal = True
-        for i in range(sma_count - 1):
-            if not item[f'sma_{i}'] > item[f'sma_{i + 1}']:
-                buy_signal = False
-                break
-
-        if buy_signal:
-            return Side.BUY
-
-        sell_signal = True
-        for i in range(sma_count - 1):
-            if not item[f'sma_{i}'] < item[f'sma_{i + 1}']:
-                sell_signal = False
-                break
-
-        if sell_signal:
-            return Side.SELL
-
-        return None
-
-
-class KcSignal:
-    def __init__(self):
-        pass
-
-    def apply(self, item: pd.Series) -> Side:
-        sma_count = int(item['sma_count'])
-
-        if not sma_count > 0:
-            return None
-
-        buy_signal = True
-        for i in range(sma_count - 1):
-            if not item[f'sma_{i}'] > item[f'sma_{i + 1}']:
-                buy_signal = False
-                break
-
-        if buy_signal:
-            return Side.BUY
-
-        sell_signal = True
-        for i in range(sma_count - 1):
-            if not item[f'sma_{i}'] < item[f'sma_{i + 1}']:
-                sell_signal = False
-                break
-
-        if sell_signal:
-            return Side.SELL
-
-        return None
-
-
 def plt_chart(ticks: pd.DataFrame, tradings: pd.DataFrame = None):
     fig = plt.figure()
 
@@ -161,13 +101,11 @@ def main():
                 f'{sma}s', min_periods=1)['last'].mean()
             index += 1
 
-        ticks['sma_count'] = len(smas)
-
-        signal = SmaSignal()
+        signal = SmaSignal([f'sma_{i}' for i in range(len(smas))])
 
         logging.info('Trading simulate...')
-        simulate = TradingSimulate()
-        simulate.compute(ticks, signal.apply, take_stop)
+        simulate = TradingSimulate(engine=Engine.COMPILED)
+        simulate.compute(ticks, signal, take_stop)
 
         logging.info('Creating trading data frame...')
         trades = simulate.to_dataframe()
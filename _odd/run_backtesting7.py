@@ -6,29 +6,12 @@ import pandas as pd
 import pytz
 
 from backtesting import pltbalance, pltchart
+from backtesting.ledger import Ledger
 from backtesting.transaction import Transaction
 from strategy import Side
 from strategy.mt5_client import MT5Client
 
 
-def trades_todataframe(trades: list[Transaction]):
-    data = [item.todict() for item in trades]
-
-    if not data:
-        return pd.DataFrame()
-
-    df = pd.DataFrame(
-        data=data,
-        columns=data[0].keys())
-
-    df.index = df['entry_time']
-    df.drop(columns=['entry_time'], inplace=True)
-
-    df['balance'] = df['pips'].cumsum()
-
-    return df
-
-
 def main():
     logging.basicConfig(
         level=logging.INFO,
@@ -116,7 +99,7 @@ def main():
             if lasttrade and lasttrade.is_open:
                 lasttrade.close(chart.iloc[-1].name, chart.iloc[-1]['close'])
 
-            all_trades = pd.concat([all_trades, trades_todataframe(trades)])
+            all_trades = pd.concat([all_trades, Ledger.fromtransactions(trades).todataframe()])
             all_chart = pd.concat([all_chart, chart])
 
         all_trades['balance'] = all_trades['pips'].cumsum()
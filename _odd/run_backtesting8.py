@@ -3,87 +3,14 @@ from datetime import datetime
 
 import MetaTrader5 as mt5
 import numpy as np
-import pandas as pd
 import pytz
 import ta
 
 from backtesting import pltchart
-from backtesting.transaction import Transaction
+from backtesting.orders import simplifyorders, sumprofit
 from strategy.mt5_client import MT5Client
 
 
-def trades_todataframe(trades: list[Transaction]):
-    data = [item.todict() for item in trades]
-
-    if not data:
-        return pd.DataFrame()
-
-    df = pd.DataFrame(
-        data=data,
-        columns=data[0].keys())
-
-    df.index = df['entry_time']
-    df.drop(columns=['entry_time'], inplace=True)
-
-    df['balance'] = df['pips'].cumsum()
-
-    return df
-
-
-def simplifyorders(chart: pd.DataFrame):
-    buy = []
-    sell = []
-
-    side = None
-
-    for _, r in chart.iterrows():
-        if r['buy'] and side != 1:
-            side = 1
-
-            buy.append(True)
-            sell.append(False)
-
-        elif r['sell'] and side != 2:
-            side = 2
-
-            buy.append(False)
-            sell.append(True)
-        else:
-            buy.append(False)
-            sell.append(False)
-
-    chart['buy'] = buy
-    chart['sell'] = sell
-
-
-def sumprofit(chart: pd.DataFrame, slippage=0):
-    price = 0
-    profit = []
-
-    for _, r in chart.iterrows():
-        if not price:
-            if r['buy']:
-                price = r['open'] + slippage
-
-            if r['sell']:
-                price = r['open'] - slippage
-
-            continue
-
-        if r['buy']:
-            profit.append(price - r['open'] + slippage)
-            price = r['open'] + slippage
-
-        if r['sell']:
-            profit.append(r['open'] - slippage - price)
-            price = r['open'] - slippage
-
-    print(profit)
-
-    logging.info(
-        f'Profit {dict(len=len(profit), sum=np.sum(profit), min=np.min(profit), max=np.max(profit))}')
-
-
 def main():
     logging.basicConfig(
         level=logging.INFO,
@@ -0,0 +1,423 @@
+from enum import Enum
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+from backtesting.fill import FillModel
+from backtesting.ledger import Ledger, nanoseconds
+from strategy import Side
+
+BUY = Side.BUY.value
+SELL = Side.SELL.value
+
+
+class Engine(Enum):
+    PYTHON = 1
+    COMPILED = 2
+    INTRABAR = 3
+    POSITION = 4
+
+EPSILON = 1e-9
+
+
+@njit(cache=True)
+def _update(k, price, side, entry_price, pips, min_pips, max_pips):
+    if side[k] == BUY:
+        pips[k] = price - entry_price[k]
+    else:
+        pips[k] = entry_price[k] - price
+
+    if pips[k] < min_pips[k]:
+        min_pips[k] = pips[k]
+
+    if pips[k] > max_pips[k]:
+        max_pips[k] = pips[k]
+
+
+@njit(cache=True)
+def _compute(signal, bid, ask, times, allowbuy, allowsell, take, stop, trailing,
+             side, entry_time, exit_time, operating_time, entry_price, exit_price, pips, min_pips, max_pips):
+    count = 0
+    isopen = False
+
+    for i in range(len(signal)):
+        if isopen:
+            k = count - 1
+            price = bid[i] if side[k] == BUY else ask[i]
+            _update(k, price, side, entry_price, pips, min_pips, max_pips)
+
+            close = False
+
+            if take and pips[k] >= abs(take):
+                close = True
+            elif stop and pips[k] <= -abs(stop):
+                close = True
+            elif trailing and max_pips[k] > trailing and max_pips[k] - pips[k] >= abs(trailing):
+                close = True
+            elif side[k] == BUY and signal[i] == SELL:
+                close = True
+            elif side[k] == SELL and signal[i] == BUY:
+                close = True
+
+            if close:
+                exit_price[k] = price
+                exit_time[k] = times[i]
+                operating_time[k] = times[i] - entry_time[k]
+                isopen = False
+
+        if not isopen:
+            if signal[i] == BUY and allowbuy:
+                side[count] = BUY
+                entry_price[count] = ask[i]
+            elif signal[i] == SELL and allowsell:
+                side[count] = SELL
+                entry_price[count] = bid[i]
+            else:
+                continue
+
+            entry_time[count] = times[i]
+            pips[count] = 0
+            min_pips[count] = 0
+            max_pips[count] = 0
+            count += 1
+            isopen = True
+
+    if isopen:
+        k = count - 1
+        i = len(signal) - 1
+        price = bid[i] if side[k] == BUY else ask[i]
+        _update(k, price, side, entry_price, pips, min_pips, max_pips)
+        exit_price[k] = price
+        exit_time[k] = times[i]
+        operating_time[k] = times[i] - entry_time[k]
+
+    return count
+
+
+def _ledgerargs(row: dict[str, np.ndarray]) -> tuple:
+    return (row['side'], row['entry_time'], row['exit_time'], row['operating_time'],
+            row['entry_price'], row['exit_price'], row['pips'], row['min_pips'], row['max_pips'])
+
+
+def compute(signal: np.ndarray, bid: np.ndarray, ask: np.ndarray, index: pd.DatetimeIndex, sides: list[Side],
+            risk: tuple[float, float, float] = None, ledger: Ledger = None) -> Ledger:
+    take, stop, trailing = risk if risk else (None, None, None)
+
+    if ledger is None:
+        ledger = Ledger(capacity=len(signal))
+
+    if ledger.tz is None:
+        ledger.tz = index.tz
+
+    count = _compute(
+        np.ascontiguousarray(signal, dtype=np.int8),
+        np.ascontiguousarray(bid, dtype=np.float64),
+        np.ascontiguousarray(ask, dtype=np.float64),
+        nanoseconds(index),
+        Side.BUY in sides, Side.SELL in sides,
+        float(take or 0), float(stop or 0), float(trailing or 0),
+        *_ledgerargs(ledger.reserve(len(signal))))
+
+    ledger.commit(count)
+
+    return ledger
+
+
+def _first(positions: np.ndarray, start: int) -> int:
+    k = np.searchsorted(positions, start, side='left')
+    return positions[k] if k < len(positions) else -1
+
+
+def _risk(pips: np.ndarray, take: float, stop: float, trailing: float) -> tuple[int, np.ndarray]:
+    max_pips = np.maximum.accumulate(np.maximum(pips, 0))
+    hit = np.zeros(len(pips), dtype=bool)
+
+    if take:
+        hit |= pips >= abs(take)
+    if stop:
+        hit |= pips <= -abs(stop)
+    if trailing:
+        hit |= (max_pips > trailing) & (max_pips - pips >= abs(trailing))
+
+    return (int(np.argmax(hit)) if hit.any() else -1), max_pips
+
+
+def intrabar(signal: np.ndarray, bid: np.ndarray, ask: np.ndarray, index: pd.DatetimeIndex,
+             ticktimes: np.ndarray, tickbid: np.ndarray, tickask: np.ndarray, sides: list[Side],
+             risk: tuple[float, float, float] = None, ledger: Ledger = None, slippage: float = 0) -> Ledger:
+    take, stop, trailing = risk if risk else (None, None, None)
+
+    if ledger is None:
+        ledger = Ledger(capacity=len(signal))
+
+    if ledger.tz is None:
+        ledger.tz = index.tz
+
+    times = nanoseconds(index)
+
+    # primeiro tick de cada barra, calculado uma unica vez
+    bounds = np.append(np.searchsorted(ticktimes, times, side='left'), len(ticktimes))
+
+    buys = np.flatnonzero(signal == BUY)
+    sells = np.flatnonzero(signal == SELL)
+    entries = np.flatnonzero(((signal == BUY) & (Side.BUY in sides)) |
+                             ((signal == SELL) & (Side.SELL in sides)))
+
+    last = len(signal) - 1
+    cursor = 0
+
+    while True:
+        i = _first(entries, cursor)
+        if i < 0:
+            break
+
+        side = signal[i]
+        entry_price = ask[i] if side == BUY else bid[i]
+
+        # barra da reversao pelo sinal oposto, ou a ultima barra
+        j = _first(sells if side == BUY else buys, i + 1)
+        reverse = j >= 0
+
+        if not reverse:
+            j = last
+
+        # ticks apos a abertura da barra de entrada ate a barra de saida
+        a = min(bounds[i] + 1, bounds[i + 1])
+        b = bounds[j] if reverse else bounds[-1]
+        prices = tickbid[a:b] - slippage if side == BUY else tickask[a:b] + slippage
+        pips = prices - entry_price if side == BUY else entry_price - prices
+
+        t, max_pips = _risk(pips, take, stop, trailing)
+
+        if t >= 0:
+            exit_time = ticktimes[a + t]
+            exit_price = prices[t]
+            pips = pips[:t + 1]
+            # o tick de saida pode ser a abertura da barra, que ainda pode reabrir
+            cursor = np.searchsorted(bounds, a + t, side='left')
+        else:
+            exit_time = times[j]
+            exit_price = bid[j] if side == BUY else ask[j]
+            pips = np.append(
+                pips, exit_price - entry_price if side == BUY else entry_price - exit_price)
+            max_pips = np.maximum.accumulate(np.maximum(pips, 0))
+            cursor = j if reverse else last + 1
+
+        ledger.add(side, times[i], entry_price, exit_time, exit_price,
+                   pips[-1], min(pips.min(), 0), max_pips[len(pips) - 1])
+
+    return ledger
+
+
+def totargets(signal: np.ndarray, volume: float, sides: list[Side]) -> np.ndarray:
+    # posicao alvo +volume/-volume a cada sinal, nan mantem a posicao atual
+    return np.where((signal == BUY) & (Side.BUY in sides), volume,
+                    np.where((signal == SELL) & (Side.SELL in sides), -volume,
+                             np.where(signal == 0, np.nan, 0)))
+
+
+@njit(cache=True)
+def _partial(k, closed, net, average, opened, unitmin, unitmax, time, price,
+             side, entry_time, exit_time, operating_time, entry_price, exit_price, pips, min_pips, max_pips, volume):
+    unit = price - average if net > 0 else average - price
+
+    side[k] = BUY if net > 0 else SELL
+    volume[k] = closed
+    entry_time[k] = opened
+    entry_price[k] = average
+    exit_time[k] = time
+    exit_price[k] = price
+    operating_time[k] = time - opened
+    pips[k] = unit * closed
+    min_pips[k] = min(unitmin, unit) * closed
+    max_pips[k] = max(unitmax, unit) * closed
+
+
+@njit(cache=True)
+def _position(targets, bid, ask, times, take, stop, trailing,
+              side, entry_time, exit_time, operating_time, entry_price, exit_price, pips, min_pips, max_pips, volume):
+    count = 0
+    net = 0.0
+    average = 0.0
+    opened = 0
+    unitmin = 0.0
+    unitmax = 0.0
+
+    for i in range(len(targets) + 1):
+        last = i == len(targets)
+        i = min(i, len(targets) - 1)
+        hold = last or np.isnan(targets[i])
+
+        if abs(net) > EPSILON:
+            price = bid[i] if net > 0 else ask[i]
+            unit = price - average if net > 0 else average - price
+            unitmin = min(unitmin, unit)
+            unitmax = max(unitmax, unit)
+
+            # risco avaliado por lote, zera a posicao inteira antes do novo alvo
+            if last or (take and unit >= abs(take)) or (stop and unit <= -abs(stop)) or \
+                    (trailing and unitmax > trailing and unitmax - unit >= abs(trailing)):
+                _partial(count, abs(net), net, average, opened, unitmin, unitmax, times[i], price,
+                         side, entry_time, exit_time, operating_time, entry_price, exit_price, pips, min_pips, max_pips, volume)
+                count += 1
+                net = 0.0
+
+        if hold:
+            continue
+
+        # ordem ate o alvo: virada, aumento ou reducao parcial
+        order = targets[i] - net
+
+        if abs(order) <= EPSILON:
+            continue
+
+        price = ask[i] if order > 0 else bid[i]
+
+        if abs(net) > EPSILON and (order > 0) != (net > 0):
+            closed = min(abs(order), abs(net))
+            _partial(count, closed, net, average, opened, unitmin, unitmax, times[i], price,
+                     side, entry_time, exit_time, operating_time, entry_price, exit_price, pips, min_pips, max_pips, volume)
+            count += 1
+
+            net += closed if net < 0 else -closed
+            order += closed if order < 0 else -closed
+
+            if abs(net) <= EPSILON:
+                net = 0.0
+
+        if abs(order) <= EPSILON:
+            continue
+
+        if abs(net) <= EPSILON:
+            average = price
+            opened = times[i]
+            unitmin = 0.0
+            unitmax = 0.0
+        else:
+            # preco medio ponderado pelo volume
+            average = (average * abs(net) + price * abs(order)) / (abs(net) + abs(order))
+
+        net += order
+
+    return count
+
+
+def position(targets: np.ndarray, bid: np.ndarray, ask: np.ndarray, index: pd.DatetimeIndex,
+             risk: tuple[float, float, float] = None, ledger: Ledger = None) -> Ledger:
+    take, stop, trailing = risk if risk else (None, None, None)
+
+    if ledger is None:
+        ledger = Ledger(capacity=len(targets) + 1)
+
+    if ledger.tz is None:
+        ledger.tz = index.tz
+
+    ledger.sized = True
+
+    if not len(targets):
+        return ledger
+
+    row = ledger.reserve(len(targets) + 1)
+    count = _position(
+        np.ascontiguousarray(targets, dtype=np.float64),
+        np.ascontiguousarray(bid, dtype=np.float64),
+        np.ascontiguousarray(ask, dtype=np.float64),
+        nanoseconds(index),
+        float(take or 0), float(stop or 0), float(trailing or 0),
+        *_ledgerargs(row), row['volume'])
+
+    ledger.commit(count)
+
+    return ledger
+
+
+@njit(cache=True)
+def _close(k, time, price, slippage, side, entry_time, exit_time, operating_time,
+           entry_price, exit_price, pips, min_pips, max_pips):
+    exit_time[k] = time
+    operating_time[k] = time - entry_time[k]
+    exit_price[k] = price + slippage if side[k] == SELL else price - slippage
+    _update(k, exit_price[k], side, entry_price, pips, min_pips, max_pips)
+
+
+@njit(cache=True)
+def _reverse(buy, sell, buyprice, sellprice, times, closetime, closebuy, closesell, slippage, histamount,
+             side, entry_time, exit_time, operating_time, entry_price, exit_price, pips, min_pips, max_pips):
+    count = 0
+    isopen = False
+
+    # preco nan: sem execucao possivel na barra, a posicao e o sinal sao ignorados
+    for i in range(max(histamount - 1, 0), len(times)):
+        if isopen:
+            k = count - 1
+            if (side[k] == BUY and sell[i]) or (side[k] == SELL and buy[i]):
+                price = sellprice[i] if side[k] == BUY else buyprice[i]
+                if np.isnan(price):
+                    continue
+                _close(k, times[i], price, slippage, side, entry_time, exit_time, operating_time,
+                       entry_price, exit_price, pips, min_pips, max_pips)
+                isopen = False
+            else:
+                continue
+
+        if buy[i] and not np.isnan(buyprice[i]):
+            side[count] = BUY
+            entry_price[count] = buyprice[i] + slippage
+        elif sell[i] and not buy[i] and not np.isnan(sellprice[i]):
+            side[count] = SELL
+            entry_price[count] = sellprice[i] - slippage
+        else:
+            continue
+
+        entry_time[count] = times[i]
+        pips[count] = 0
+        min_pips[count] = 0
+        max_pips[count] = 0
+        count += 1
+        isopen = True
+
+    if isopen:
+        k = count - 1
+        _close(k, closetime, closebuy if side[k] == BUY else closesell, 0.0, side, entry_time, exit_time,
+               operating_time, entry_price, exit_price, pips, min_pips, max_pips)
+
+    return count
+
+
+def reverse(chart: pd.DataFrame, price: str = 'open', slippage: float = 0, histamount: int = 3,
+            ledger: Ledger = None, fill: FillModel = None) -> Ledger:
+    if ledger is None:
+        ledger = Ledger(capacity=len(chart))
+
+    if ledger.tz is None:
+        ledger.tz = chart.index.tz
+
+    times = nanoseconds(chart.index)
+
+    if fill is None:
+        buyprice = sellprice = chart[price].to_numpy(dtype=np.float64)
+        closetime = times[-1] if len(times) else 0
+        closebuy = closesell = float(chart['close'].iat[-1]) if len(chart) else np.nan
+    else:
+        # com fill o argumento price e ignorado: executa no primeiro tick de bid/ask apos o
+        # sinal mais a latencia, e a posicao aberta no fim fecha no ultimo tick (bid/ask)
+        times, sellprice, buyprice = fill.quotes(times)
+        closetime, closebuy, closesell = fill.last()
+
+    count = _reverse(
+        chart['buy'].to_numpy(dtype=np.bool_),
+        chart['sell'].to_numpy(dtype=np.bool_),
+        buyprice, sellprice, times,
+        closetime, float(closebuy), float(closesell),
+        float(slippage), histamount,
+        *_ledgerargs(ledger.reserve(len(chart))))
+
+    ledger.commit(count)
+
+    return ledger
+
+
+def tradesexec(chart: pd.DataFrame, price: str = 'open', slippage: float = 0, histamount: int = 3,
+               fill: FillModel = None) -> pd.DataFrame:
+    return reverse(chart, price, slippage, histamount, fill=fill).todataframe()
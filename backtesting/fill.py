@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from backtesting.ledger import NAT, nanoseconds
+from strategy import Side
+
+
+def _lastvalid(prices: np.ndarray) -> np.ndarray:
+    # repete o ultimo preco valido nos ticks com bid/ask zerado, nan antes do primeiro valido
+    index = np.maximum.accumulate(np.where(prices > 0, np.arange(1, len(prices) + 1), 0))
+    return np.append(np.nan, prices)[index]
+
+
+class FillModel:
+    def __init__(self, ticks: pd.DataFrame, latency: timedelta = timedelta(0)):
+        if ticks.empty:
+            raise Exception('Invalid arg: ticks.')
+
+        self.times = nanoseconds(ticks.index)
+        self.bid = _lastvalid(ticks['bid'].to_numpy(dtype=np.float64))
+        self.ask = _lastvalid(ticks['ask'].to_numpy(dtype=np.float64))
+        self.latency = int(latency / timedelta(microseconds=1)) * 1000
+
+    def locate(self, times: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        index = np.searchsorted(self.times, np.asarray(times, dtype=np.int64) + self.latency, side='left')
+        filled = index < len(self.times)
+
+        return np.minimum(index, len(self.times) - 1), filled
+
+    def quotes(self, times: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # sem tick apos o sinal nao ha execucao: tempo NAT e precos nan
+        index, filled = self.locate(times)
+
+        return (np.where(filled, self.times[index], NAT),
+                np.where(filled, self.bid[index], np.nan),
+                np.where(filled, self.ask[index], np.nan))
+
+    def last(self) -> tuple[int, float, float]:
+        return self.times[-1], self.bid[-1], self.ask[-1]
+
+    def fill(self, times: np.ndarray, sides: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        filltimes, bid, ask = self.quotes(times)
+        return filltimes, np.where(np.asarray(sides) == Side.BUY.value, ask, bid)
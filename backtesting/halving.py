@@ -0,0 +1,58 @@
+import logging
+import math
+from typing import Callable
+
+import pandas as pd
+
+from backtesting.sweep import SweepPool, togrid
+
+
+def halving(days: dict[any, pd.DataFrame], computebars: Callable[[pd.DataFrame, dict], None],
+            grid: dict[str, list], mindays: int = 2, factor: int = 2, processes: int = None,
+            rank: str = 'profit') -> pd.DataFrame:
+    keys = sorted(days)
+    candidates = togrid(grid)
+
+    if not candidates:
+        raise ValueError('Invalid arg: grid.')
+
+    frames = [params['frame'] for params in candidates]
+
+    alive = list(range(len(candidates)))
+    budget = min(mindays, len(keys))
+    cache = {}
+    evaluated = {}
+
+    with SweepPool(days, computebars, frames, processes) as pool:
+        while True:
+            used = keys[:budget]
+
+            # candidatos promovidos so simulam os dias que ainda nao tem no cache
+            tasks = [(day, candidate, candidates[candidate])
+                     for candidate in alive for day in used if (day, candidate) not in cache]
+
+            for result in pool.run(tasks):
+                cache[(result['day'], result['candidate'])] = result[rank]
+
+            scores = {candidate: sum(cache[(day, candidate)] for day in used)
+                      for candidate in alive}
+
+            for candidate, score in scores.items():
+                evaluated[candidate] = (budget, score)
+
+            logging.info(
+                f'Halving round {dict(days=budget, candidates=len(alive), tasks=len(tasks))}')
+
+            if budget >= len(keys) or len(alive) <= 1:
+                break
+
+            keep = max(math.ceil(len(alive) / factor), 1)
+            alive = sorted(alive, key=lambda candidate: scores[candidate],
+                           reverse=True)[:keep]
+            budget = min(budget * factor, len(keys))
+
+    results = pd.DataFrame([
+        dict(candidate=candidate, **candidates[candidate], days=budget, score=score)
+        for candidate, (budget, score) in evaluated.items()])
+
+    return results.sort_values(['days', 'score'], ascending=False, ignore_index=True)
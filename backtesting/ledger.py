@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+from backtesting.transaction import Transaction
+from strategy import Side
+
+LEDGER_DTYPES = dict(
+    side=np.int8,
+    volume=np.float64,
+    entry_time=np.int64,
+    entry_price=np.float64,
+    exit_price=np.float64,
+    exit_time=np.int64,
+    operating_time=np.int64,
+    pips=np.float64,
+    min_pips=np.float64,
+    max_pips=np.float64,
+    is_open=np.bool_,
+    balance=np.float64,
+)
+
+SIDES = np.array([None, Side.BUY, Side.SELL], dtype=object)
+
+NAT = np.iinfo(np.int64).min
+
+
+def nanoseconds(index: pd.DatetimeIndex) -> np.ndarray:
+    return index.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
+class Ledger:
+    def __init__(self, capacity: int = 1024, tz=None):
+        self.tz = tz
+        self.count = 0
+        self.sized = False
+        self.columns = {name: np.zeros(max(capacity, 1), dtype=dtype)
+                        for name, dtype in LEDGER_DTYPES.items()}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name][:self.count]
+
+    def reserve(self, size: int) -> dict[str, np.ndarray]:
+        capacity = len(self.columns['pips'])
+
+        if self.count + size > capacity:
+            capacity = max(capacity * 2, self.count + size)
+
+            for name, column in self.columns.items():
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[:self.count] = column[:self.count]
+                self.columns[name] = grown
+
+        # um lote por padrao, apenas o motor de posicao informa o volume
+        self.columns['volume'][self.count:self.count + size] = 1
+
+        return {name: column[self.count:self.count + size]
+                for name, column in self.columns.items()}
+
+    def commit(self, size: int):
+        self.count += size
+
+    def add(self, side: int, entry_time: int, entry_price: float, exit_time: int, exit_price: float,
+            pips: float, min_pips: float, max_pips: float, is_open: bool = False, volume: float = 1):
+        row = self.reserve(1)
+        row['side'][0] = side
+        row['volume'][0] = volume
+        row['entry_time'][0] = entry_time
+        row['entry_price'][0] = entry_price
+        row['exit_price'][0] = exit_price
+        row['exit_time'][0] = exit_time
+        row['operating_time'][0] = NAT if is_open else exit_time - entry_time
+        row['pips'][0] = pips
+        row['min_pips'][0] = min_pips
+        row['max_pips'][0] = max_pips
+        row['is_open'][0] = is_open
+
+        self.commit(1)
+
+    def append(self, transaction: Transaction):
+        entry_time = pd.Timestamp(transaction.entry_time)
+
+        if self.tz is None:
+            self.tz = entry_time.tz
+
+        exit_time = NAT if transaction.is_open else pd.Timestamp(
+            transaction.exit_time).value
+
+        self.add(transaction.side.value, entry_time.value, transaction.entry_price,
+                 exit_time, transaction.exit_price, transaction.pips,
+                 transaction.min_pips, transaction.max_pips, transaction.is_open)
+
+    @staticmethod
+    def fromtransactions(transactions: list[Transaction]) -> 'Ledger':
+        ledger = Ledger(capacity=len(transactions))
+
+        for transaction in transactions:
+            ledger.append(transaction)
+
+        return ledger
+
+    def _times(self, name: str) -> pd.DatetimeIndex:
+        times = pd.DatetimeIndex(self[name].view('datetime64[ns]'))
+
+        if self.tz is not None:
+            times = times.tz_localize('UTC').tz_convert(self.tz)
+
+        return times
+
+    def todataframe(self) -> pd.DataFrame:
+        if not self.count:
+            return pd.DataFrame()
+
+        np.cumsum(self['pips'], out=self['balance'])
+
+        # volume so aparece quando o motor de posicao varia o tamanho das operacoes
+        volume = dict(volume=self['volume']) if self.sized else {}
+
+        return pd.DataFrame(
+            data=dict(
+                side=SIDES[self['side']],
+                **volume,
+                entry_price=self['entry_price'],
+                exit_price=self['exit_price'],
+                exit_time=self._times('exit_time'),
+                operating_time=self['operating_time'].view('timedelta64[ns]'),
+                pips=self['pips'],
+                min_pips=self['min_pips'],
+                max_pips=self['max_pips'],
+                is_open=self['is_open'],
+                balance=self['balance']),
+            index=self._times('entry_time').rename('entry_time'),
+            copy=False)
@@ -0,0 +1,128 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from backtesting.ledger import Ledger
+
+HOUR = 3600 * 10 ** 9
+DAY = 24 * HOUR
+
+
+class Metrics:
+    def __init__(self):
+        self.trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.gross_profit = float(0)
+        self.gross_loss = float(0)
+        self.sumsq = float(0)
+        self.downsumsq = float(0)
+
+        self.balance = float(0)
+        self.peak = float(0)
+        self.peaktime = None
+        self.max_drawdown = float(0)
+        self.max_drawdown_duration = 0
+
+        self.hours = np.zeros((3, 24))
+        self.weekdays = np.zeros((3, 7))
+        self._excursions = []
+
+    def _breakdown(self, table: np.ndarray, keys: np.ndarray, pips: np.ndarray):
+        size = table.shape[1]
+        table[0] += np.bincount(keys, minlength=size)
+        table[1] += np.bincount(keys, weights=pips, minlength=size)
+        table[2] += np.bincount(keys, weights=pips > 0, minlength=size)
+
+    def extend(self, pips: np.ndarray, entry_time: np.ndarray, exit_time: np.ndarray,
+               min_pips: np.ndarray, max_pips: np.ndarray):
+        pips = np.asarray(pips, dtype=np.float64)
+        entry_time = np.asarray(entry_time, dtype=np.int64)
+        exit_time = np.asarray(exit_time, dtype=np.int64)
+
+        if not len(pips):
+            return
+
+        self.trades += len(pips)
+        self.wins += int((pips > 0).sum())
+        self.losses += int((pips < 0).sum())
+        self.gross_profit += pips[pips > 0].sum()
+        self.gross_loss += -pips[pips < 0].sum()
+        self.sumsq += (pips ** 2).sum()
+        self.downsumsq += (np.minimum(pips, 0) ** 2).sum()
+
+        # drawdown continua a partir do saldo e do pico anteriores
+        if self.peaktime is None:
+            self.peaktime = entry_time[0]
+
+        balance = self.balance + np.cumsum(pips)
+        peak = np.maximum(self.peak, np.maximum.accumulate(balance))
+        ispeak = balance >= peak
+        peaktime = np.maximum(self.peaktime, np.maximum.accumulate(
+            np.where(ispeak, exit_time, np.iinfo(np.int64).min)))
+
+        self.max_drawdown = max(self.max_drawdown, (peak - balance).max())
+        self.max_drawdown_duration = max(self.max_drawdown_duration,
+                                         int(np.where(ispeak, 0, exit_time - peaktime).max()))
+
+        self.balance = balance[-1]
+        self.peak = peak[-1]
+        self.peaktime = peaktime[-1]
+
+        self._breakdown(self.hours, (entry_time // HOUR) % 24, pips)
+        # 1970-01-01 foi uma quinta-feira, segunda-feira = 0
+        self._breakdown(self.weekdays, (entry_time // DAY + 3) % 7, pips)
+
+        self._excursions.append(np.stack((min_pips, max_pips)).astype(np.float64))
+
+    def update(self, pips: float, entry_time: int, exit_time: int, min_pips: float = 0, max_pips: float = 0):
+        self.extend([pips], [entry_time], [exit_time], [min_pips], [max_pips])
+
+    def extendledger(self, ledger: Ledger):
+        self.extend(ledger['pips'], ledger['entry_time'], ledger['exit_time'],
+                    ledger['min_pips'], ledger['max_pips'])
+
+    def excursions(self) -> pd.DataFrame:
+        if not self._excursions:
+            return pd.DataFrame(columns=['mae', 'mfe'])
+
+        if len(self._excursions) > 1:
+            self._excursions = [np.concatenate(self._excursions, axis=1)]
+
+        return pd.DataFrame(dict(mae=self._excursions[0][0], mfe=self._excursions[0][1]))
+
+    def breakdown(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        def todataframe(table: np.ndarray, name: str) -> pd.DataFrame:
+            df = pd.DataFrame(dict(trades=table[0], profit=table[1], wins=table[2]))
+            df['win_rate'] = df['wins'] / df['trades'].where(df['trades'] > 0)
+            df.index.name = name
+            return df[df['trades'] > 0]
+
+        return todataframe(self.hours, 'hour'), todataframe(self.weekdays, 'weekday')
+
+    def summary(self) -> dict:
+        profit = self.gross_profit - self.gross_loss
+        expectancy = profit / self.trades if self.trades else np.nan
+        variance = self.sumsq / self.trades - expectancy ** 2 if self.trades else np.nan
+        downside = math.sqrt(self.downsumsq / self.trades) if self.trades else np.nan
+        excursions = self.excursions()
+
+        return dict(
+            trades=self.trades,
+            wins=self.wins,
+            losses=self.losses,
+            win_rate=self.wins / self.trades if self.trades else np.nan,
+            profit=profit,
+            gross_profit=self.gross_profit,
+            gross_loss=self.gross_loss,
+            profit_factor=self.gross_profit / self.gross_loss if self.gross_loss else np.inf if self.trades else np.nan,
+            expectancy=expectancy,
+            avg_win=self.gross_profit / self.wins if self.wins else np.nan,
+            avg_loss=-self.gross_loss / self.losses if self.losses else np.nan,
+            max_drawdown=self.max_drawdown,
+            max_drawdown_duration=pd.Timedelta(self.max_drawdown_duration),
+            sharpe=expectancy / math.sqrt(variance) if variance and variance > 0 else np.nan,
+            sortino=expectancy / downside if downside else np.nan,
+            mae_median=excursions['mae'].median(),
+            mfe_median=excursions['mfe'].median())
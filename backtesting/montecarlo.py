@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from backtesting.ledger import Ledger
+
+
+def _resample(pips: np.ndarray, size: int, method: str, rng: np.random.Generator) -> np.ndarray:
+    if method == 'bootstrap':
+        return pips[rng.integers(0, len(pips), size=(size, len(pips)))]
+
+    if method == 'shuffle':
+        return rng.permuted(np.broadcast_to(pips, (size, len(pips))), axis=1)
+
+    raise Exception('Invalid arg: method.', method)
+
+
+def _streaks(wins: np.ndarray) -> np.ndarray:
+    # tamanho da maior sequencia de True em cada linha
+    rows, columns = wins.shape
+    index = np.broadcast_to(np.arange(1, columns + 1), (rows, columns))
+    resets = np.maximum.accumulate(np.where(wins, 0, index), axis=1)
+
+    return (index - resets).max(axis=1, initial=0)
+
+
+def _statistics(paths: np.ndarray) -> dict[str, np.ndarray]:
+    balance = np.cumsum(paths, axis=1)
+    peak = np.maximum(np.maximum.accumulate(balance, axis=1), 0)
+
+    return dict(
+        profit=balance[:, -1],
+        drawdown=(peak - balance).max(axis=1),
+        win_streak=_streaks(paths > 0),
+        loss_streak=_streaks(paths < 0))
+
+
+def montecarlo(trades: Ledger | pd.DataFrame, simulations: int = 10000, method: str = 'bootstrap',
+               chunksize: int = 1000, seed: int = None) -> pd.DataFrame:
+    pips = np.asarray(trades['pips'], dtype=np.float64)
+
+    if not len(pips):
+        return pd.DataFrame()
+
+    rng = np.random.default_rng(seed)
+    chunks = []
+
+    # limita a memoria a chunksize x trades por vez
+    for start in range(0, simulations, chunksize):
+        size = min(chunksize, simulations - start)
+        chunks.append(_statistics(_resample(pips, size, method, rng)))
+
+    return pd.DataFrame({name: np.concatenate([chunk[name] for chunk in chunks])
+                         for name in chunks[0]})
+
+
+def robustness(simulations: pd.DataFrame, quantiles: list[float] = [0.05, 0.25, 0.5, 0.75, 0.95]) -> pd.DataFrame:
+    summary = simulations.quantile(quantiles)
+    summary.loc['mean'] = simulations.mean()
+    summary.loc['loss_probability', 'profit'] = (simulations['profit'] < 0).mean()
+
+    return summary
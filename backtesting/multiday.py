@@ -0,0 +1,54 @@
+import logging
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+from typing import Callable
+
+import pandas as pd
+import pytz
+
+
+def sessions(days: int, start: tuple[int, int] = (9, 0), end: tuple[int, int] = (17, 20),
+             now: datetime = None) -> list[tuple[datetime, datetime]]:
+    now = now or datetime.now()
+    result = []
+
+    for day in reversed(range(days)):
+        date = now - timedelta(days=day)
+        result.append((
+            datetime(date.year, date.month, date.day, *start, tzinfo=pytz.utc),
+            datetime(date.year, date.month, date.day, *end, tzinfo=pytz.utc)))
+
+    return result
+
+
+def _runsession(args) -> tuple[pd.DataFrame, pd.DataFrame]:
+    runday, (start_date, end_date) = args
+    return runday(start_date, end_date)
+
+
+def merge(results: list[tuple[pd.DataFrame, pd.DataFrame]]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    charts = [chart for chart, _ in results if chart is not None and not chart.empty]
+    trades = [trade for _, trade in results if trade is not None and not trade.empty]
+
+    all_chart = pd.concat(charts) if charts else pd.DataFrame()
+    all_trades = pd.concat(trades) if trades else pd.DataFrame()
+
+    if not all_trades.empty:
+        all_trades['balance'] = all_trades['pips'].cumsum()
+
+    return all_chart, all_trades
+
+
+def multiday(days: list[tuple[datetime, datetime]],
+             runday: Callable[[datetime, datetime], tuple[pd.DataFrame, pd.DataFrame]],
+             processes: int = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    days = sorted(days)
+    results = []
+
+    with Pool(processes) as pool:
+        # imap devolve na ordem dos dias, mesmo executando fora de ordem
+        for result in pool.imap(_runsession, [(runday, day) for day in days]):
+            results.append(result)
+            logging.info(f'Day done {dict(day=days[len(results) - 1][0], count=len(results))}')
+
+    return merge(results)
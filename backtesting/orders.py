@@ -0,0 +1,65 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from strategy import Side
+
+
+def simplifyorders(chart: pd.DataFrame):
+    buy = chart['buy'].to_numpy(dtype=bool)
+    sell = chart['sell'].to_numpy(dtype=bool)
+
+    both = buy & sell
+    single = buy ^ sell
+
+    # lado definido pela ultima barra com apenas compra ou venda
+    fixed = np.where(single, np.where(buy, Side.BUY.value, Side.SELL.value), 0)
+    position = np.maximum.accumulate(np.where(single, np.arange(len(fixed)), -1))
+    base = np.where(position >= 0, fixed[np.maximum(position, 0)], 0)
+
+    # barras com compra e venda invertem o lado a cada ocorrencia
+    count = np.cumsum(both)
+    flips = count - np.where(position >= 0, count[np.maximum(position, 0)], 0)
+    start = np.where(base == 0, Side.SELL.value, base)
+    flipped = np.where(flips % 2 == 1, 3 - start, start)
+
+    side = np.where(flips > 0, flipped, base)
+    previous = np.concatenate(([0], side[:-1]))
+    changed = side != previous
+
+    chart['buy'] = changed & (side == Side.BUY.value)
+    chart['sell'] = changed & (side == Side.SELL.value)
+
+
+def sumprofit(chart: pd.DataFrame, slippage=0) -> np.ndarray:
+    buy = chart['buy'].to_numpy(dtype=bool)
+    sell = chart['sell'].to_numpy(dtype=bool)
+    open = chart['open'].to_numpy(dtype=np.float64)
+
+    rows = np.flatnonzero(buy | sell)
+    profit = np.zeros(0)
+
+    if len(rows):
+        first, rows = rows[0], rows[1:]
+        entry = open[first] - slippage if sell[first] else open[first] + slippage
+
+        # compra antes da venda quando as duas ocorrem na mesma barra
+        events = np.repeat(rows, 2)
+        isbuy = np.tile([True, False], len(rows))
+        valid = np.where(isbuy, buy[events], sell[events])
+        events, isbuy = events[valid], isbuy[valid]
+
+        prices = np.where(isbuy, open[events] + slippage,
+                          open[events] - slippage)
+        previous = np.concatenate(([entry], prices[:-1]))
+        profit = np.where(isbuy, previous - open[events] + slippage,
+                          open[events] - slippage - previous)
+
+    if len(profit):
+        logging.info(
+            f'Profit {dict(len=len(profit), sum=np.sum(profit), min=np.min(profit), max=np.max(profit))}')
+    else:
+        logging.info(f'Profit {dict(len=0)}')
+
+    return profit
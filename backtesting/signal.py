@@ -0,0 +1,50 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from backtesting.ledger import nanoseconds
+from strategy import Side
+
+NOSIDE = 0
+
+
+class Signal(ABC):
+    columns: tuple[str, ...] = ()
+
+    @abstractmethod
+    def apply(self, data: dict[str, np.ndarray]) -> np.ndarray:
+        pass
+
+    def arrays(self, data: pd.DataFrame) -> dict[str, np.ndarray]:
+        return dict(time=nanoseconds(data.index),
+                    **{column: data[column].to_numpy() for column in self.columns})
+
+
+class SmaSignal(Signal):
+    def __init__(self, columns: list[str]):
+        self.columns = tuple(columns)
+
+    def apply(self, data: dict[str, np.ndarray]) -> np.ndarray:
+        # sem medias, nenhum sinal
+        if not self.columns:
+            return np.full(len(data['time']), NOSIDE, dtype=np.int8)
+
+        smas = np.vstack([np.asarray(data[column], dtype=np.float64)
+                         for column in self.columns])
+
+        # medias estritamente ordenadas, da mais rapida para a mais lenta
+        buy = np.all(smas[:-1] > smas[1:], axis=0)
+        sell = np.all(smas[:-1] < smas[1:], axis=0)
+
+        sides = np.full(smas.shape[1], NOSIDE, dtype=np.int8)
+        sides[sell] = Side.SELL.value
+        sides[buy] = Side.BUY.value
+
+        return sides
+
+
+def tosides(values) -> np.ndarray:
+    return np.fromiter(
+        (value.value if isinstance(value, Side) else NOSIDE for value in values),
+        dtype=np.int8, count=len(values))
@@ -0,0 +1,235 @@
+import itertools
+import logging
+import os
+from multiprocessing import Pool, shared_memory
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from backtesting import engine
+from backtesting.ledger import Ledger
+from backtesting.metrics import Metrics
+from strategy import Side
+
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'open_bid', 'open_ask']
+
+
+class SharedFrame:
+    def __init__(self, data: pd.DataFrame, columns: list[str]):
+        self.tz = data.index.tz
+        self.length = len(data)
+        self.specs = {}
+        self._blocks = []
+
+        arrays = dict(time=engine.nanoseconds(data.index))
+        for column in columns:
+            arrays[column] = data[column].to_numpy(dtype=np.float64)
+
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(
+                create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype,
+                       buffer=block.buf)[:] = array
+
+            self.specs[name] = (block.name, array.dtype.str)
+            self._blocks.append(block)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_blocks'] = []
+        return state
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        if not self._blocks:
+            self._blocks = [shared_memory.SharedMemory(name=name)
+                            for name, _ in self.specs.values()]
+
+        return {name: np.ndarray((self.length,), dtype=dtype, buffer=block.buf)
+                for (name, (_, dtype)), block in zip(self.specs.items(), self._blocks)}
+
+    def todataframe(self) -> pd.DataFrame:
+        arrays = self.arrays()
+        index = pd.DatetimeIndex(arrays.pop('time').view('datetime64[ns]'))
+
+        if self.tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+
+        return pd.DataFrame(arrays, index=index)
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+
+    def unlink(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+def tobars(ticks: pd.DataFrame, frame: str) -> pd.DataFrame:
+    resample = ticks.resample(frame)
+
+    chart = resample['last'].ohlc()
+    first = resample[['bid', 'ask']].first()
+    chart['open_bid'] = first['bid']
+    chart['open_ask'] = first['ask']
+    chart.dropna(inplace=True)
+
+    return chart
+
+
+def togrid(grid: dict[str, list]) -> list[dict]:
+    return [dict(zip(grid.keys(), values)) for values in itertools.product(*grid.values())]
+
+
+def tosignal(chart: pd.DataFrame) -> np.ndarray:
+    buy = chart['buy'].to_numpy(dtype=bool)
+    sell = chart['sell'].to_numpy(dtype=bool)
+
+    return np.where(buy, Side.BUY.value, np.where(sell, Side.SELL.value, 0)).astype(np.int8)
+
+
+def evaluate(chart: pd.DataFrame, ticks: dict[str, np.ndarray], computebars: Callable[[pd.DataFrame, dict], None],
+             params: dict, ledger: Ledger = None) -> Ledger:
+    computebars(chart, params)
+
+    slippage = params.get('slippage', 0)
+    risk = (params.get('take'), params.get('stop'), params.get('trailing'))
+
+    return engine.intrabar(
+        tosignal(chart),
+        chart['open_bid'].to_numpy() - slippage,
+        chart['open_ask'].to_numpy() + slippage,
+        chart.index,
+        ticks['time'], ticks['bid'], ticks['ask'],
+        [Side.BUY, Side.SELL], risk, ledger, slippage)
+
+
+def summary(ledger: Ledger) -> dict:
+    pips = ledger['pips']
+    metrics = Metrics()
+    metrics.extendledger(ledger)
+
+    return dict(
+        **metrics.summary(),
+        min=pips.min() if len(pips) else np.nan,
+        max=pips.max() if len(pips) else np.nan)
+
+
+def toarrays(ticks: pd.DataFrame) -> dict[str, np.ndarray]:
+    return dict(
+        time=engine.nanoseconds(ticks.index),
+        bid=ticks['bid'].to_numpy(dtype=np.float64),
+        ask=ticks['ask'].to_numpy(dtype=np.float64))
+
+
+_worker = {}
+
+
+def _initworker(ticks: dict[any, SharedFrame], bars: dict[tuple, SharedFrame], computebars: Callable[[pd.DataFrame, dict], None],
+                keep: bool):
+    _worker['ticks'] = {day: shared.arrays() for day, shared in ticks.items()}
+    _worker['bars'] = bars
+    _worker['computebars'] = computebars
+    _worker['keep'] = keep
+    _worker['shared'] = [*ticks.values(), *bars.values()]
+
+
+def _runworker(task: tuple[any, int, dict]) -> dict:
+    day, candidate, params = task
+    chart = _worker['bars'][(day, params['frame'])].todataframe()
+    ledger = evaluate(chart, _worker['ticks'][day], _worker['computebars'], params)
+    result = dict(day=day, candidate=candidate, **params, **summary(ledger))
+
+    # as operacoes so voltam ao processo pai quando alguem vai reaproveita-las
+    if _worker['keep']:
+        result['trades'] = ledger.todataframe()
+
+    return result
+
+
+class SweepPool:
+    def __init__(self, days: dict[any, pd.DataFrame], computebars: Callable[[pd.DataFrame, dict], None],
+                 frames: list[str], processes: int = None, keep: bool = False):
+        self.days = days
+        self.computebars = computebars
+        self.frames = sorted(set(frames))
+        self.processes = processes or os.cpu_count()
+        self.keep = keep
+        self.sharedticks = {}
+        self.sharedbars = {}
+        self.pool = None
+
+    def __enter__(self) -> 'SweepPool':
+        logging.info(
+            f'Publishing shared data... {dict(days=len(self.days), ticks=sum(len(ticks) for ticks in self.days.values()), frames=self.frames)}')
+
+        try:
+            for day, ticks in self.days.items():
+                self.sharedticks[day] = SharedFrame(ticks, ['bid', 'ask'])
+                for frame in self.frames:
+                    self.sharedbars[(day, frame)] = SharedFrame(
+                        tobars(ticks, frame), BAR_COLUMNS)
+
+            self.pool = Pool(self.processes, initializer=_initworker,
+                             initargs=(self.sharedticks, self.sharedbars, self.computebars, self.keep))
+        except BaseException:
+            self.close()
+            raise
+
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.pool:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+        for shared in [*self.sharedticks.values(), *self.sharedbars.values()]:
+            shared.unlink()
+
+        self.sharedticks = {}
+        self.sharedbars = {}
+
+    def run(self, tasks: list[tuple[any, int, dict]]) -> list[dict]:
+        chunksize = max(len(tasks) // (self.processes * 4), 1)
+        results = []
+
+        for result in self.pool.imap_unordered(_runworker, tasks, chunksize):
+            results.append(result)
+            logged = {name: value for name, value in result.items() if name != 'trades'}
+            logging.info(
+                f'Sweep result {len(results)}/{len(tasks)}, {logged}')
+
+        return results
+
+
+def evaluateall(days: dict[any, pd.DataFrame], computebars: Callable[[pd.DataFrame, dict], None],
+                candidates: list[dict], processes: int = None, trades: dict[tuple, pd.DataFrame] = None) -> pd.DataFrame:
+    frames = [params['frame'] for params in candidates]
+
+    with SweepPool(days, computebars, frames, processes, keep=trades is not None) as pool:
+        tasks = [(day, candidate, params)
+                 for day in days for candidate, params in enumerate(candidates)]
+
+        results = pool.run(tasks)
+
+    # operacoes de cada (dia, candidato), quando pedidas
+    if trades is not None:
+        for result in results:
+            trades[(result['day'], result['candidate'])] = result.pop('trades')
+
+    return pd.DataFrame(results)
+
+
+def sweep(ticks: pd.DataFrame, computebars: Callable[[pd.DataFrame, dict], None], grid: dict[str, list],
+          processes: int = None, rank: str = 'profit') -> pd.DataFrame:
+    results = evaluateall({0: ticks}, computebars, togrid(grid), processes)
+    results.drop(columns=['day', 'candidate'], inplace=True)
+
+    return results.sort_values(rank, ascending=False, ignore_index=True)
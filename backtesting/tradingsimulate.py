@@ -5,23 +5,61 @@ from typing import Callable
 import pandas as pd
 from strategy import Side
 
+from backtesting import engine
+from backtesting.engine import Engine
+from backtesting.ledger import Ledger
+from backtesting.signal import Signal, tosides
 from backtesting.transaction import Transaction
 
 
 class TradingSimulate:
-    def __init__(self, sides: list[Side] = [Side.BUY, Side.SELL], columns: tuple[str, str] = ('bid', 'ask')):
+    def __init__(self, sides: list[Side] = [Side.BUY, Side.SELL], columns: tuple[str, str] = ('bid', 'ask'), engine: Engine = Engine.PYTHON, volume: float = 1):
         self.sides = sides
         self.transactions = []
         self.book_transactions = []
         self.columns = columns
+        self.engine = engine
+        self.volume = volume
+        self.ledger = Ledger()
 
-    def compute(self, data: pd.DataFrame, signal: Callable[[pd.Series], Side], risk: tuple[float, float, float] = None):
+    def compute(self, data: pd.DataFrame, signal: Signal | Callable[[pd.Series], Side], risk: tuple[float, float, float] = None, ticks: pd.DataFrame = None):
         logging.info('Computing signals...')
 
-        data['signal'] = data.apply(signal, axis=1)
+        if isinstance(signal, Signal):
+            data['signal'] = signal.apply(signal.arrays(data))
+        else:
+            data['signal'] = tosides(data.apply(signal, axis=1))
 
         logging.info('Computing transactions...')
 
+        if self.engine == Engine.COMPILED:
+            bid, ask = self.columns
+            engine.compute(
+                data['signal'].to_numpy(), data[bid].to_numpy(), data[ask].to_numpy(),
+                data.index, self.sides, risk, self.ledger)
+            return
+
+        if self.engine == Engine.POSITION:
+            # coluna target permite aumentar e reduzir a posicao, senao vira a mao a cada sinal
+            bid, ask = self.columns
+            targets = data['target'].to_numpy() if 'target' in data else engine.totargets(
+                data['signal'].to_numpy(), self.volume, self.sides)
+            engine.position(targets, data[bid].to_numpy(), data[ask].to_numpy(),
+                            data.index, risk, self.ledger)
+            return
+
+        if self.engine == Engine.INTRABAR:
+            if ticks is None or ticks.empty:
+                raise Exception('Invalid arg: ticks.')
+
+            bid, ask = self.columns
+            engine.intrabar(
+                data['signal'].to_numpy(), data[bid].to_numpy(), data[ask].to_numpy(),
+                data.index, engine.nanoseconds(ticks.index),
+                ticks['bid'].to_numpy(dtype=float), ticks['ask'].to_numpy(dtype=float),
+                self.sides, risk, self.ledger)
+            return
+
         transaction = None
 
         for index, row in data.iterrows():
@@ -60,10 +98,10 @@ class TradingSimulate:
                     transaction.close(index, book_price)
                     return None
 
-            if transaction.side == Side.BUY and row['signal'] == Side.SELL:
+            if transaction.side == Side.BUY and row['signal'] == Side.SELL.value:
                 transaction.close(index, book_price)
                 return None
-            elif transaction.side == Side.SELL and row['signal'] == Side.BUY:
+            elif transaction.side == Side.SELL and row['signal'] == Side.BUY.value:
                 transaction.close(index, book_price)
                 return None
 
@@ -71,25 +109,14 @@ class TradingSimulate:
 
     def __check_open(self, index: datetime, row: pd.Series) -> Transaction:
         bid, ask = self.columns
-        if row['signal'] == Side.BUY and Side.BUY in self.sides:
+        if row['signal'] == Side.BUY.value and Side.BUY in self.sides:
             return Transaction(Side.BUY, index, row[ask])
-        if row['signal'] == Side.SELL and Side.SELL in self.sides:
+        if row['signal'] == Side.SELL.value and Side.SELL in self.sides:
             return Transaction(Side.SELL, index, row[bid])
         return None
 
     def to_dataframe(self):
-        data = [item.todict() for item in self.transactions]
-
-        if not data:
-            return pd.DataFrame()
-
-        df = pd.DataFrame(
-            data=data,
-            columns=data[0].keys())
-
-        df.index = df['entry_time']
-        df.drop(columns=['entry_time'], inplace=True)
-
-        df['balance'] = df['pips'].cumsum()
+        if self.engine != Engine.PYTHON:
+            return self.ledger.todataframe()
 
-        return df
+        return Ledger.fromtransactions(self.transactions).todataframe()
@@ -0,0 +1,54 @@
+import logging
+from typing import Callable
+
+import pandas as pd
+
+from backtesting.sweep import evaluateall, togrid
+
+
+def walkforward(days: dict[any, pd.DataFrame], computebars: Callable[[pd.DataFrame, dict], None],
+                grid: dict[str, list], train: int, test: int, processes: int = None,
+                rank: str = 'profit') -> tuple[pd.DataFrame, pd.DataFrame]:
+    keys = sorted(days)
+    candidates = togrid(grid)
+
+    # cada dia x candidato e simulado uma unica vez e reaproveitado por todas as janelas,
+    # inclusive as operacoes fora da amostra
+    daytrades = {}
+    results = evaluateall(days, computebars, candidates, processes, daytrades)
+    scores = results.pivot(index='day', columns='candidate', values=rank)
+    scores = scores.reindex(index=keys, columns=range(len(candidates))).fillna(0)
+
+    windows = []
+    trades = []
+
+    for start in range(0, len(keys) - train, test):
+        traindays = keys[start:start + train]
+        testdays = keys[start + train:start + train + test]
+
+        candidate = int(scores.loc[traindays].sum().idxmax())
+        params = candidates[candidate]
+
+        logging.info(
+            f'Walk forward window {dict(train=traindays[0], test=testdays[0], params=params)}')
+
+        for day in testdays:
+            trades.append(daytrades[(day, candidate)])
+
+        windows.append(dict(
+            train_start=traindays[0],
+            train_end=traindays[-1],
+            test_start=testdays[0],
+            test_end=testdays[-1],
+            candidate=candidate,
+            **params,
+            train_score=scores.loc[traindays, candidate].sum(),
+            test_score=scores.loc[testdays, candidate].sum()))
+
+    trades = [trade for trade in trades if not trade.empty]
+    all_trades = pd.concat(trades) if trades else pd.DataFrame()
+
+    if not all_trades.empty:
+        all_trades['balance'] = all_trades['pips'].cumsum()
+
+    return pd.DataFrame(windows), all_trades
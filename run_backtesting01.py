@@ -3,35 +3,15 @@ from datetime import datetime
 from unicodedata import decimal
 
 import numpy as np
-import pandas as pd
 import pytz
-from _odd.run_backtesting8 import simplifyorders, sumprofit
 
 from backtesting import pltchart
 from backtesting.data import Data
-from backtesting.transaction import Transaction
+from backtesting.orders import simplifyorders, sumprofit
 
 from ta.volatility import average_true_range
 
 
-def tradestodataframe(trades: list[Transaction]):
-    data = [item.todict() for item in trades]
-
-    if not data:
-        return pd.DataFrame()
-
-    df = pd.DataFrame(
-        data=data,
-        columns=data[0].keys())
-
-    df.index = df['entry_time']
-    df.drop(columns=['entry_time'], inplace=True)
-
-    df['balance'] = df['pips'].cumsum()
-
-    return df
-
-
 def closelasttrade(chart, trades):
     lasttrade = trades[-1] if trades else None
     if lasttrade and lasttrade.is_open:
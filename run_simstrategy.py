@@ -2,6 +2,7 @@ import logging
 import math
 import os
 import random
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from time import sleep
 from typing import Callable, Tuple
@@ -15,6 +16,9 @@ from ta.trend import cci
 
 from strategy import Side
 from strategy.mt5_client import MT5Client
+from strategy.orderledger import OrderLedger
+from strategy.quote import LastQuote
+from strategy.report import TradeReport
 
 
 class Loop:
@@ -33,10 +37,18 @@ class Loop:
         self.magic = 5544
         self.ticks = pd.DataFrame()
         self.tickscache = pd.DataFrame()
+        self.tickstimes = np.array([], dtype=np.int64)
         self.bars = pd.DataFrame()
-        self.requests = pd.DataFrame()
+        self.requests = OrderLedger(sides=True)
+        self.quote = LastQuote()
+        self.report = TradeReport('simulation-trades.csv')
 
         self._startdate = None
+        self._window = (0, 0)
+        self._fired = None
+        self._dayend = None
+        self._nextday: Future = None
+        self._prefetcher = ThreadPoolExecutor(max_workers=1)
         self.__current = pd.Series()
 
         if type(self.simulate) != dict:
@@ -46,49 +58,21 @@ class Loop:
             raise Exception('Invalid arg: simulate.startdate.')
 
         self._startdate = self.simulate['startdate']
+        self._present = datetime.now().replace(tzinfo=pytz.utc)
 
         if not 'step' in self.simulate:
             self.simulate['step'] = timedelta(seconds=1)
 
+        if 'enddate' in self.simulate and (type(self.simulate['enddate']) != datetime or self.simulate['enddate'].tzinfo != pytz.utc):
+            raise Exception('Invalid arg: simulate.enddate.')
+
         self.client.connect()
         logging.info('Loading symbol...')
         if not self._loadsymbol():
             raise Exception('Symbol not loaded.')
         self._loadallday()
         self.client.disconnect()
-
-    def _requeststocsv(self):
-        requests = self.requests.copy()
-        profits = []
-        p = pd.Series(dtype=object)
-
-        for _, r in requests.iterrows():
-            if p.empty:
-                p = r
-                profits.append(0)
-                continue
-
-            if p['type'] == Side.BUY:
-                profits.append(r['price'] - p['price'])
-            elif p['type'] == Side.SELL:
-                profits.append(p['price'] - r['price'])
-
-            if 'position' in r and r['position'] > 0:
-                p = pd.Series(dtype=object)
-            else:
-                p = r
-
-        if len(profits) < len(requests):
-            if p['type'] == Side.BUY:
-                profits.append(self.bars.iloc[-1]['close'] - p['price'])
-            elif p['type'] == Side.SELL:
-                profits.append(p['price'] - self.bars.iloc[-1]['close'])
-
-        requests['profit'] = profits
-        requests['cumsum_profit'] = requests['profit'].cumsum()
-
-        if not requests.empty:
-            requests.to_csv('simulation-trades.csv', sep='\t')
+        self._prefetch()
 
     def _loadsymbol(self) -> bool:
         self.symbol_info = mt5.symbol_info(self.symbol)
@@ -114,31 +98,129 @@ class Loop:
 
         return start_date, end_date
 
+    def _idlesteps(self) -> int:
+        start, end = self._window
+
+        # nova ordem, o pipeline roda de novo com a mesma janela
+        if self._fired is None or self._fired[1] != len(self.requests):
+            return 1
+
+        events = []
+        if end < len(self.tickstimes):
+            events.append(self.tickstimes[end])
+        if start < end:
+            events.append(self.tickstimes[start] +
+                          pd.Timedelta(self.offset).value + 1)
+        if self._dayend:
+            events.append(pd.Timestamp(self._dayend).value)
+
+        if not events:
+            return 1
+
+        # salta direto para o passo em que um tick entra ou sai da janela
+        step = pd.Timedelta(self.simulate['step']).value
+        distance = min(events) - pd.Timestamp(self._startdate).value
+
+        return max(math.ceil(distance / step), 1)
+
     def _slidestartdate(self):
-        self._startdate += self.simulate['step']
-        now = datetime.now().replace(tzinfo=pytz.utc)
-        if self._startdate > now:
-            self._startdate = now
+        self._startdate += self.simulate['step'] * self._idlesteps()
+
+        # o relogio so e consultado quando o salto passa do ultimo instante lido
+        if self._startdate > self._present:
+            self._present = datetime.now().replace(tzinfo=pytz.utc)
+            if self._startdate > self._present:
+                self._startdate = self._present
+        if 'enddate' in self.simulate and self._startdate > self.simulate['enddate']:
+            self._startdate = self.simulate['enddate']
         logging.info(f'Now is {self._startdate}')
 
     def _loadticks(self) -> bool:
         startdate, enddate = self._dates()
-        self.ticks = self.tickscache[startdate:enddate]
+        start, end = self._window
+
+        # ponteiros monotonicos, o tempo simulado so avanca
+        start += np.searchsorted(
+            self.tickstimes[start:], pd.Timestamp(startdate).value, side='left')
+        end = max(end, start)
+        end += np.searchsorted(
+            self.tickstimes[end:], pd.Timestamp(enddate).value, side='right')
+
+        self._window = (start, end)
+        self.ticks = self.tickscache.iloc[start:end]
+        self.quote.update(self.ticks)
         return not self.ticks.empty
 
+    def _loadday(self, startdate: datetime) -> pd.DataFrame:
+        status, ticks = self.client.get_ticks(
+            self.symbol, startdate, startdate + timedelta(days=1), mt5.COPY_TICKS_ALL)
+
+        if status != mt5.RES_S_OK:
+            logging.warning(f'No data... {dict(day=startdate)}')
+            return pd.DataFrame()
+
+        return ticks
+
+    def _fetchday(self, startdate: datetime) -> pd.DataFrame:
+        self.client.connect()
+        try:
+            return self._loadday(startdate)
+        finally:
+            self.client.disconnect()
+
+    def _prefetch(self):
+        # carrega o proximo dia em segundo plano enquanto o dia atual e simulado
+        self._nextday = None
+        if 'enddate' in self.simulate and self._dayend > self.simulate['enddate']:
+            return
+
+        logging.info(f'Prefetching day... {dict(day=self._dayend)}')
+        self._nextday = self._prefetcher.submit(self._fetchday, self._dayend)
+
+    def _setticks(self, ticks: pd.DataFrame):
+        self.tickscache = ticks
+        self.tickstimes = ticks.index.to_numpy(
+            dtype='datetime64[ns]').view(np.int64) if not ticks.empty else np.array([], dtype=np.int64)
+
+    def _rollday(self):
+        if self._startdate < self._dayend:
+            return
+
+        try:
+            ticks = self._nextday.result() if self._nextday else pd.DataFrame()
+        except Exception:
+            # falha no carregamento nao trava a simulacao, o dia segue sem ticks
+            logging.error(f'Prefetch failed {dict(day=self._dayend)}', exc_info=True)
+            ticks = pd.DataFrame()
+
+        # descarta os dias anteriores, mantendo apenas o que a janela ainda enxerga
+        cutoff = pd.Timestamp(self._dayend - self.offset).value
+        dropped = int(np.searchsorted(self.tickstimes, cutoff, side='left'))
+        frames = [frame for frame in [self.tickscache.iloc[dropped:], ticks] if not frame.empty]
+        self._setticks(pd.concat(frames) if frames else pd.DataFrame())
+
+        start, end = self._window
+        self._window = (max(start - dropped, 0), max(end - dropped, 0))
+        if self._fired:
+            self._fired = (self._window, self._fired[1])
+
+        logging.info(
+            f'Day rolled {dict(day=self._dayend, ticks=len(ticks), evicted=dropped)}')
+
+        self._dayend += timedelta(days=1)
+        self._prefetch()
+
     def _loadallday(self) -> bool:
         startdate = self._startdate.replace(
             hour=0, minute=0, second=0, microsecond=0)
-        enddate = startdate + timedelta(days=1)
 
-        status, ticks = self.client.get_ticks(
-            self.symbol, startdate, enddate, mt5.COPY_TICKS_ALL)
+        ticks = self._loadday(startdate)
+        self._setticks(ticks)
+        self._window = (0, 0)
 
-        if status != mt5.RES_S_OK:
-            logging.warning('No data...')
-            return False
+        self._dayend = startdate + timedelta(days=1)
 
-        self.tickscache = ticks
+        return not ticks.empty
 
     def _orderdic(self, result):
         result_dict = result._asdict()
@@ -150,24 +232,15 @@ class Loop:
         return result_dict
 
     def _appendrequest(self, request: dict[any], request_date: datetime):
-        self.requests = pd.concat(
-            [self.requests, pd.DataFrame([request], columns=request.keys(), index=[request_date])])
+        self.requests.append(request, request_date)
 
     def _getprice(self) -> tuple[float, float]:
-        bid = float(0)
-        ask = float(0)
-
-        for _, p in self.ticks.iloc[::-1].iterrows():
-            if p['bid']:
-                bid = p['bid']
-                break
-
-        for _, p in self.ticks.iloc[::-1].iterrows():
-            if p['ask']:
-                ask = p['ask']
-                break
+        if self.ticks.empty:
+            return (float(0), float(0))
 
-        return (bid, ask)
+        # ultimo bid/ask valido dentro da janela
+        since = self.ticks.index[0]
+        return (self.quote.get('bid', since), self.quote.get('ask', since))
 
     def _sendorder(self, lot: float, side: Side, position: int = None) -> dict[any, any]:
         bid, ask = self._getprice()
@@ -197,11 +270,8 @@ class Loop:
         }
 
     def _simposition(self):
-        if self.requests.empty:
-            return pd.DataFrame()
-
-        last_request = self.requests.iloc[-1].copy()
-        if 'position' in last_request.keys() and not math.isnan(last_request['position']):
+        last_request = self.requests.lastopen()
+        if last_request is None:
             return pd.DataFrame()
 
         if last_request['volume'] != self.lot:
@@ -209,7 +279,7 @@ class Loop:
             last_request['volume'] = self.lot
 
         simpositions = pd.DataFrame(
-            [last_request], columns=self.requests.columns, index=[last_request.name])
+            [last_request], index=[last_request.pop('time')])
         simpositions['ticket'] = [random.randint(1, 100000000)]
 
         return simpositions
@@ -275,22 +345,46 @@ class Loop:
             logging.info('Sending sell order...')
             self._sendorder(self.lot, Side.SELL)
 
-    def exec(self):
+    def finished(self) -> bool:
+        return 'enddate' in self.simulate and self._startdate >= self.simulate['enddate']
+
+    def exec(self) -> bool:
+        if self.finished():
+            return False
+
+        self._exec()
+
+        return True
+
+    def _exec(self):
         logging.info('Slide start date...')
         self._slidestartdate()
 
+        self._rollday()
+
         logging.info('Loading ticks...')
         if not self._loadticks():
             return
 
+        # sem tick novo e sem ordem nova o resultado seria o mesmo do passo anterior
+        fired = (self._window, len(self.requests))
+        if fired == self._fired:
+            return
+
         logging.info('Computing chart...')
         self.computebars(self)
 
         logging.info('Operating the market...')
         self._dotrade()
+        self._fired = fired
+
+        logging.info('Updating trades file...')
+        self.report.update(self.requests)
 
+    def close(self):
         logging.info('Generating trades file...')
-        self._requeststocsv()
+        self.report.close(self.requests)
+        self._prefetcher.shutdown(wait=False, cancel_futures=True)
 
 
 def startlogs():
@@ -352,17 +446,22 @@ def main():
                 simulate=simulate,
                 computebars=_computebars)
 
-    while True:
-        try:
-            logging.info('Running loop...')
-            loop.exec()
-            logging.info('Loop executed...')
-        except KeyboardInterrupt:
-            logging.error('Requested stop', exc_info=True)
-            quit()
-        except Exception:
-            logging.error('Unknown error', exc_info=True)
-            sleep(1)
+    try:
+        while True:
+            try:
+                logging.info('Running loop...')
+                if not loop.exec():
+                    logging.info('Simulation finished...')
+                    break
+                logging.info('Loop executed...')
+            except KeyboardInterrupt:
+                logging.error('Requested stop', exc_info=True)
+                break
+            except Exception:
+                logging.error('Unknown error', exc_info=True)
+                sleep(1)
+    finally:
+        loop.close()
 
 
 if __name__ == "__main__":
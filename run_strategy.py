@@ -1,8 +1,7 @@
 import logging
-import math
 import random
 from datetime import datetime, timedelta
-from time import sleep
+from time import perf_counter_ns, sleep
 from typing import Callable, Tuple
 
 import MetaTrader5 as mt5
@@ -13,11 +12,18 @@ from ta.momentum import rsi
 from ta.trend import cci
 
 from strategy import Side
+from strategy.latency import Latency, localtime
 from strategy.mt5_client import MT5Client
+from strategy.ordertracker import OrderTracker
+from strategy.orderledger import OrderLedger
+from strategy.quote import LastQuote
+from strategy.report import TradeReport
+from strategy.scheduler import Scheduler
+from strategy.tickfeed import TickFeed
 
 
 class Loop:
-    def __init__(self, client: MT5Client, symbol: str, lot: float, offset: timedelta, simulate: dict, computebars: Callable[[any], None]):
+    def __init__(self, client: MT5Client, symbol: str, lot: float, offset: timedelta, simulate: dict, computebars: Callable[[any], None], capacity: int = 500000):
         self.client = client
         self.symbol = symbol
         self.lot = lot
@@ -31,9 +37,20 @@ class Loop:
         self.ticks = pd.DataFrame()
         self.tickscache = pd.DataFrame()
         self.bars = pd.DataFrame()
-        self.requests = pd.DataFrame()
+        self.requests = OrderLedger(sides=False)
+        self.quote = LastQuote()
+        self.capacity = capacity
+        self.feed = None
+        self.feeds = {}
+        self.windows = {}
+        self.barcache = None
+        self.tracker = OrderTracker(client)
+        self.latency = Latency()
+        self.report = None
 
         self._sim_startdate = None
+        self._decision = 0
+        self._sent = 0
 
         if type(self.simulate) != dict:
             raise Exception('Invalid arg: simulate.')
@@ -50,53 +67,19 @@ class Loop:
             if not 'step' in self.simulate:
                 self.simulate['step'] = timedelta(seconds=1)
 
-    def _requeststocsv(self):
-        requests = self.requests.copy()
-        profits = []
-        p = pd.Series(dtype=object)
-
-        for _, r in requests.iterrows():
-            if p.empty:
-                p = r
-                profits.append(0)
-                continue
-
-            if p['type'] == mt5.POSITION_TYPE_BUY:
-                profits.append(r['price'] - p['price'])
-            elif p['type'] == mt5.POSITION_TYPE_SELL:
-                profits.append(p['price'] - r['price'])
-
-            p = r
-
-        if len(profits) < len(requests):
-            if p['type'] == mt5.POSITION_TYPE_BUY:
-                profits.append(self.bars.iloc[-1]['close'] - p['price'])
-            elif p['type'] == mt5.POSITION_TYPE_SELL:
-                profits.append(p['price'] - self.bars.iloc[-1]['close'])
-
-        requests['profit'] = profits
-        requests['cumsum_profit'] = requests['profit'].cumsum()
-
-        if not requests.empty:
-            requests.to_csv('simulation-trades.csv', sep='\t')
+            self.report = TradeReport('simulation-trades.csv',
+                                      buy=mt5.POSITION_TYPE_BUY, sell=mt5.POSITION_TYPE_SELL)
 
     def _loadsymbol(self) -> bool:
-        self.symbol_info = mt5.symbol_info(self.symbol)
-
-        if self.symbol_info is None:
-            logging.error(
-                f'Symbol not found: {self.symbol}')
-            return False
+        self.symbol_info = self.client.select_symbol(self.symbol)
 
-        if not self.symbol_info.visible:
-            logging.info(
-                f'Symbol is not visible, trying to switch on: {self.symbol}')
+        return self.symbol_info is not None
 
-            if not mt5.symbol_select(self.symbol, True):
-                logging.error(f'Symbol select failed: {self.symbol}')
-                return False
+    def _barframe(self) -> int:
+        if len(self.bars) < 2:
+            return 0
 
-        return True
+        return (self.bars.index[1:] - self.bars.index[:-1]).min().value
 
     def _dates(self) -> Tuple[datetime, datetime]:
         now = datetime.now().replace(tzinfo=pytz.utc)
@@ -121,14 +104,27 @@ class Loop:
         startdateodd = startdate
         enddateodd = enddate
 
-        if self.simulate['simulation']:
-            if self.tickscache.empty:
-                startdate = startdate.replace(
-                    hour=0, minute=0, second=0, microsecond=0)
-                enddate = startdate + timedelta(days=1)
-            else:
-                self.ticks = self.tickscache[startdate:enddate]
-                return not self.ticks.empty
+        if not self.simulate['simulation']:
+            if self.feed is None:
+                self.feed = TickFeed(self.client, self.symbol, self.capacity)
+
+            # apenas os ticks novos sao pedidos ao terminal
+            if self.feed.update(startdate, enddate) < 0:
+                logging.warning('No data...')
+                return False
+
+            self.ticks = self.feed.window(startdate)
+            self.quote.update(self.ticks)
+            return not self.ticks.empty
+
+        if self.tickscache.empty:
+            startdate = startdate.replace(
+                hour=0, minute=0, second=0, microsecond=0)
+            enddate = startdate + timedelta(days=1)
+        else:
+            self.ticks = self.tickscache[startdate:enddate]
+            self.quote.update(self.ticks)
+            return not self.ticks.empty
 
         status, ticks = self.client.get_ticks(
             self.symbol, startdate, enddate, mt5.COPY_TICKS_ALL)
@@ -139,6 +135,7 @@ class Loop:
 
         self.ticks = ticks[startdateodd:enddateodd]
         self.tickscache = ticks
+        self.quote.update(self.ticks)
 
         return not self.ticks.empty
 
@@ -151,9 +148,8 @@ class Loop:
 
         return result_dict
 
-    def _appendrequest(self, request: dict[any], request_date: datetime):
-        self.requests = pd.concat(
-            [self.requests, pd.DataFrame([request], columns=request.keys(), index=[request_date])])
+    def _appendrequest(self, request: dict[any], request_date: datetime, trace: dict[str, int] = None):
+        self.requests.append(request, request_date, trace)
 
     def _getprice(self, side: Side) -> float | None:
         if not self.simulate['simulation']:
@@ -163,15 +159,17 @@ class Loop:
                 return self.symbol_info.bid
             return None
 
+        if self.ticks.empty:
+            return None
+
+        # ultimo bid/ask valido dentro da janela
+        since = self.ticks.index[0]
+
         if side == Side.BUY:
-            for _, p in self.ticks.iloc[::-1].iterrows():
-                if p['ask']:
-                    return p['ask']
+            return self.quote.get('ask', since) or None
 
         if side == Side.SELL:
-            for _, p in self.ticks.iloc[::-1].iterrows():
-                if p['bid']:
-                    return p['bid']
+            return self.quote.get('bid', since) or None
 
         return None
 
@@ -209,8 +207,20 @@ class Loop:
                 'retcode': mt5.TRADE_RETCODE_DONE
             }
 
-        result = mt5.order_send(request)
-        self._appendrequest(request, datetime.now().replace(tzinfo=pytz.utc))
+        # o rotulo da barra em formacao e o fechamento da ultima barra completa
+        trace = dict(
+            tick_time=self.ticks.index[-1].value,
+            receive_time=self.feed.received,
+            bar_time=self.bars.index[-1].value,
+            bar_frame=self._barframe(),
+            decision_time=self._decision,
+            send_time=localtime())
+
+        # envio ate confirmacao medido no relogio monotonico
+        self._sent = perf_counter_ns()
+        with self.latency.measure('order_send'):
+            result = mt5.order_send(request)
+        self._appendrequest(request, datetime.now().replace(tzinfo=pytz.utc), trace)
 
         if not result or result.retcode != mt5.TRADE_RETCODE_DONE:
             if not result:
@@ -222,16 +232,37 @@ class Loop:
 
         return self._orderdic(result)
 
-    def _postorderwait(self):
+    def _postorderwait(self, result: dict[any, any]):
         if not self.simulate['simulation']:
-            sleep(5)
+            with self.latency.measure('confirmation'):
+                confirmed = self.tracker.wait(result)
 
-    def _simposition(self):
+            # ordem sem request nao chegou ao ledger, nada a rastrear
+            if not result or not 'request' in result:
+                return
+
+            if confirmed:
+                k = len(self.requests) - 1
+                self.requests.confirm(k, self.requests['send_time'][k] + perf_counter_ns() - self._sent)
+
+            self._traceorder()
+
+    def _traceorder(self):
         if self.requests.empty:
-            return pd.DataFrame()
+            return
+
+        latencies = self.requests.latencies(len(self.requests) - 1)
 
-        last_request = self.requests.iloc[-1].copy()
-        if 'position' in last_request.keys() and not math.isnan(last_request['position']):
+        # negativo so quando o relogio local esta atras do servidor, fica so no ledger
+        for stage, seconds in latencies.items():
+            if seconds >= 0:
+                self.latency.record(stage, seconds)
+
+        logging.info(f'Order latency (seconds) {latencies}')
+
+    def _simposition(self):
+        last_request = self.requests.lastopen()
+        if last_request is None:
             return pd.DataFrame()
 
         if last_request['volume'] != self.lot:
@@ -239,7 +270,7 @@ class Loop:
             last_request['volume'] = self.lot
 
         simpositions = pd.DataFrame(
-            [last_request], columns=self.requests.columns, index=[last_request.name])
+            [last_request], index=[last_request.pop('time')])
         simpositions['ticket'] = [random.randint(1, 100000000)]
 
         return simpositions
@@ -264,7 +295,10 @@ class Loop:
             logging.info('Simulating positions...')
             positions = self._simposition()
         else:
-            status, positions = self.client.get_position(self.symbol)
+            with self.latency.measure('get_position'):
+                status, positions = self.client.get_position(self.symbol)
+
+            self._decision = localtime()
 
             if status != mt5.RES_S_OK:
                 logging.error(
@@ -274,12 +308,10 @@ class Loop:
         if positions.empty:
             if signal == Side.BUY:
                 logging.info('Sending buy order...')
-                self._sendorder(self.lot, Side.BUY)
-                self._postorderwait()
+                self._postorderwait(self._sendorder(self.lot, Side.BUY))
             elif signal == Side.SELL:
                 logging.info('Sending sell order...')
-                self._sendorder(self.lot, Side.SELL)
-                self._postorderwait()
+                self._postorderwait(self._sendorder(self.lot, Side.SELL))
 
             return
 
@@ -287,35 +319,67 @@ class Loop:
 
         if position['type'] == mt5.POSITION_TYPE_SELL and signal == Side.BUY:
             logging.info('Invert sell to buy...')
-            self._sendorder(position['volume'] * 2, Side.BUY)
-            self._postorderwait()
+            self._postorderwait(self._sendorder(position['volume'] * 2, Side.BUY))
         elif position['type'] == mt5.POSITION_TYPE_BUY and signal == Side.SELL:
             logging.info('Invert buy to sell...')
-            self._sendorder(position['volume'] * 2, Side.SELL)
-            self._postorderwait()
+            self._postorderwait(self._sendorder(position['volume'] * 2, Side.SELL))
         else:
             logging.info('Staying in position...')
 
     def exec(self):
-        self.client.connect()
+        with self.latency.measure('exec'):
+            self._exec()
+
+        self.latency.report()
+
+    def _exec(self):
+        with self.latency.measure('connect'):
+            self.client.connect()
 
         logging.info('Loading symbol...')
-        if not self._loadsymbol():
-            return
+        with self.latency.measure('loadsymbol'):
+            if not self._loadsymbol():
+                return
 
         logging.info('Loading ticks...')
-        if not self._loadticks():
-            return
+        with self.latency.measure('loadticks'):
+            if not self._loadticks():
+                return
+
+        self.step()
+
+    def resample(self, frame: str) -> pd.DataFrame:
+        # barras compartilhadas entre estrategias do mesmo simbolo e janela
+        key = (self.symbol, self.offset, frame)
 
+        if self.barcache is None or key not in self.barcache:
+            chart = self.ticks.resample(frame)['last'].ohlc()
+            chart.dropna(inplace=True)
+
+            if self.barcache is None:
+                return chart
+
+            self.barcache[key] = chart
+
+        return self.barcache[key].copy()
+
+    def step(self):
         logging.info('Computing chart...')
-        self.computebars(self)
+        with self.latency.measure('computebars'):
+            self.computebars(self)
 
         logging.info('Operating the market...')
-        self._dotrade()
+        with self.latency.measure('dotrade'):
+            self._dotrade()
 
         if self.simulate['simulation']:
+            logging.info('Updating trades file...')
+            self.report.update(self.requests)
+
+    def close(self):
+        if self.report is not None:
             logging.info('Generating trades file...')
-            self._requeststocsv()
+            self.report.close(self.requests)
 
 
 def main():
@@ -328,8 +392,7 @@ def main():
     )
 
     def __computebars(self):
-        chart = self.ticks.resample('5s')['last'].ohlc()
-        chart.dropna(inplace=True)
+        chart = self.resample('5s')
 
         range = float(2)
         valuerange = []
@@ -366,17 +429,27 @@ def main():
                 simulate=simulate,
                 computebars=__computebars)
 
-    while True:
-        try:
-            logging.info('Running loop...')
-            loop.exec()
-            logging.info('Loop executed...')
-        except KeyboardInterrupt:
-            logging.error('Requested stop', exc_info=True)
-            quit()
-        except Exception:
-            logging.error('Unknown error', exc_info=True)
-            sleep(1)
+    # ao vivo a estrategia roda pelo scheduler, que divide sessao, feeds e barras
+    if not simulate['simulation']:
+        scheduler = Scheduler(loop.client)
+        scheduler.add(loop)
+        scheduler.run()
+        return
+
+    try:
+        while True:
+            try:
+                logging.info('Running loop...')
+                loop.exec()
+                logging.info('Loop executed...')
+            except KeyboardInterrupt:
+                logging.error('Requested stop', exc_info=True)
+                break
+            except Exception:
+                logging.error('Unknown error', exc_info=True)
+                sleep(1)
+    finally:
+        loop.close()
 
 
 if __name__ == "__main__":
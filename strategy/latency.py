@@ -0,0 +1,97 @@
+import bisect
+import json
+import logging
+import math
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from time import monotonic, perf_counter
+
+import numpy as np
+import pandas as pd
+import pytz
+
+# limites dos buckets em segundos, 20 por decada de 1us a 100s (~12% de resolucao)
+BUCKETS = list(np.geomspace(1e-6, 100, 161))
+
+
+def localtime() -> int:
+    # relogio local rotulado como utc, como em Loop._dates; os ticks e as barras vem no
+    # relogio do servidor, entao diferencas entre os dois incluem o offset do broker
+    return pd.Timestamp(datetime.now().replace(tzinfo=pytz.utc)).value
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = float(0)
+        self.max = float(0)
+
+    def record(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return np.nan
+
+        # limite superior do bucket que contem o percentil
+        k = int(np.searchsorted(np.cumsum(self.counts), math.ceil(q * self.count), side='left'))
+
+        return min(BUCKETS[k], self.max) if k < len(BUCKETS) else self.max
+
+    def todict(self) -> dict:
+        return dict(
+            count=self.count,
+            mean=self.total / self.count if self.count else np.nan,
+            p50=self.percentile(0.5),
+            p95=self.percentile(0.95),
+            p99=self.percentile(0.99),
+            max=self.max)
+
+
+class Latency:
+    def __init__(self, filename: str = 'latency.json', interval: timedelta = timedelta(minutes=1)):
+        self.filename = filename
+        self.interval = interval.total_seconds()
+        self.stages: dict[str, Histogram] = {}
+        self.reported = monotonic()
+
+    def record(self, stage: str, seconds: float):
+        if not stage in self.stages:
+            self.stages[stage] = Histogram()
+
+        self.stages[stage].record(seconds)
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, perf_counter() - start)
+
+    def summary(self) -> pd.DataFrame:
+        return pd.DataFrame({stage: histogram.todict() for stage, histogram in self.stages.items()}).T
+
+    def report(self, force: bool = False):
+        if not force and monotonic() - self.reported < self.interval:
+            return
+
+        self.reported = monotonic()
+
+        if not self.stages:
+            return
+
+        logging.info(f'Latency summary (seconds)\n{self.summary()}')
+
+        stages = {stage: dict(**histogram.todict(),
+                              buckets=[[BUCKETS[k] if k < len(BUCKETS) else None, count]
+                                       for k, count in enumerate(histogram.counts) if count])
+                  for stage, histogram in self.stages.items()}
+
+        with open(self.filename, 'w') as file:
+            json.dump(dict(time=datetime.now(tz=pytz.utc).isoformat(), stages=stages), file)
@@ -72,6 +72,39 @@ class MT5Client:
 
         return status, pd.DataFrame()
 
+    def get_deals(self, order: int) -> tuple[int, pd.DataFrame]:
+        mt5deals = mt5.history_deals_get(ticket=order)
+        status, status_message = mt5.last_error()
+
+        if status != mt5.RES_S_OK:
+            logging.error(
+                f'Get deals failed, error code = {dict(status=status, message=status_message)}')
+            return status, pd.DataFrame()
+
+        if mt5deals:
+            columns = mt5deals[0]._asdict().keys()
+            return status, pd.DataFrame(list(mt5deals), columns=columns)
+
+        return status, pd.DataFrame()
+
+    def select_symbol(self, symbol: str) -> any:
+        info = mt5.symbol_info(symbol)
+
+        if info is None:
+            logging.error(
+                f'Symbol not found: {symbol}')
+            return None
+
+        if not info.visible:
+            logging.info(
+                f'Symbol is not visible, trying to switch on: {symbol}')
+
+            if not mt5.symbol_select(symbol, True):
+                logging.error(f'Symbol select failed: {symbol}')
+                return None
+
+        return info
+
     def connect(self):
         logging.info('Connect to MetaTrader 5...')
         if not mt5.initialize():
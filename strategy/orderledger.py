@@ -0,0 +1,184 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from strategy import Side
+
+NAT = np.iinfo(np.int64).min
+
+ORDER_DTYPES = dict(
+    time=np.int64,
+    volume=np.float64,
+    type=np.int8,
+    price=np.float64,
+    position=np.int64,
+    action=np.int64,
+    deviation=np.int64,
+    magic=np.int64,
+    comment=object,
+    type_time=np.int64,
+    type_filling=np.int64,
+    tick_time=np.int64,
+    receive_time=np.int64,
+    bar_time=np.int64,
+    bar_frame=np.int64,
+    decision_time=np.int64,
+    send_time=np.int64,
+    confirm_time=np.int64,
+)
+
+# campos do request mt5 ao vivo, so aparecem no dataframe quando foram enviados
+REQUEST_COLUMNS = ['action', 'deviation', 'magic', 'comment', 'type_time', 'type_filling']
+
+TRACE_COLUMNS = ['tick_time', 'receive_time', 'bar_time', 'decision_time', 'send_time', 'confirm_time']
+
+# etapas do tick ate a confirmacao, em pares (inicio, fim); os tick_to_* partem da hora
+# local de chegada do tick, bar_to_decision compara o relogio do servidor com o local
+TRACE_STAGES = dict(
+    tick_to_decision=('receive_time', 'decision_time'),
+    bar_to_decision=('bar_time', 'decision_time'),
+    decision_to_send=('decision_time', 'send_time'),
+    send_to_confirm=('send_time', 'confirm_time'),
+    tick_to_send=('receive_time', 'send_time'),
+    tick_to_confirm=('receive_time', 'confirm_time'),
+)
+
+
+class OrderLedger:
+    def __init__(self, capacity: int = 1024, sides: bool = False):
+        self.sides = sides
+        self.tz = None
+        self.symbol = None
+        self.count = 0
+        self.traced = False
+        self.detailed = False
+        self.columns = {name: np.zeros(max(capacity, 1), dtype=dtype)
+                        for name, dtype in ORDER_DTYPES.items()}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name][:self.count]
+
+    @property
+    def empty(self) -> bool:
+        return not self.count
+
+    def _grow(self):
+        capacity = len(self.columns['time']) * 2
+
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            self.columns[name] = grown
+
+    def append(self, request: dict[str, any], time: datetime, trace: dict[str, int] = None):
+        if self.count == len(self.columns['time']):
+            self._grow()
+
+        time = pd.Timestamp(time)
+        if self.tz is None:
+            self.tz = time.tz
+
+        if self.symbol is None:
+            self.symbol = request.get('symbol')
+
+        kind = request['type']
+        k = self.count
+
+        self.columns['time'][k] = time.value
+        self.columns['volume'][k] = request['volume']
+        self.columns['type'][k] = kind.value if isinstance(kind, Side) else kind
+        self.columns['price'][k] = request['price']
+        self.columns['position'][k] = request.get('position') or 0
+
+        for column in REQUEST_COLUMNS:
+            self.columns[column][k] = request.get(column, self.columns[column].dtype.type())
+        self.detailed |= 'action' in request
+
+        for column in TRACE_COLUMNS:
+            self.columns[column][k] = trace.get(column) or 0 if trace else 0
+        self.columns['bar_frame'][k] = trace.get('bar_frame') or 0 if trace else 0
+        self.traced |= bool(trace)
+
+        self.count += 1
+
+    def confirm(self, k: int, time: int):
+        self.columns['confirm_time'][k] = time
+
+    def latencies(self, k: int) -> dict[str, float]:
+        # segundos de cada etapa registrada da ordem k
+        return {stage: (self.columns[end][k] - self.columns[start][k]) / 10 ** 9
+                for stage, (start, end) in TRACE_STAGES.items()
+                if self.columns[start][k] and self.columns[end][k]}
+
+    def row(self, k: int) -> dict[str, any]:
+        kind = int(self.columns['type'][k])
+        position = int(self.columns['position'][k])
+
+        return dict(
+            time=self._times(self.columns['time'][k:k + 1])[0],
+            volume=float(self.columns['volume'][k]),
+            type=Side(kind) if self.sides else kind,
+            price=float(self.columns['price'][k]),
+            position=position if position else np.nan)
+
+    def last(self) -> dict[str, any] | None:
+        return self.row(self.count - 1) if self.count else None
+
+    def lastopen(self) -> dict[str, any] | None:
+        # a ultima ordem sem ticket de posicao abre (ou vira) a posicao
+        if not self.count or self.columns['position'][self.count - 1]:
+            return None
+
+        return self.last()
+
+    def _times(self, times: np.ndarray) -> pd.DatetimeIndex:
+        times = pd.DatetimeIndex(times.view('datetime64[ns]'))
+
+        if self.tz is not None:
+            times = times.tz_localize('UTC').tz_convert(self.tz)
+
+        return times
+
+    def todataframe(self, start: int = 0, end: int = None) -> pd.DataFrame:
+        end = self.count if end is None else min(end, self.count)
+
+        if start >= end:
+            return pd.DataFrame()
+
+        kinds = self.columns['type'][start:end]
+        positions = self.columns['position'][start:end]
+
+        # mesma ordem de colunas dos requests mt5
+        data = dict(
+            action=self.columns['action'][start:end],
+            symbol=self.symbol,
+            volume=self.columns['volume'][start:end],
+            type=[Side(kind) for kind in kinds] if self.sides else kinds,
+            price=self.columns['price'][start:end],
+            deviation=self.columns['deviation'][start:end],
+            magic=self.columns['magic'][start:end],
+            comment=self.columns['comment'][start:end],
+            type_time=self.columns['type_time'][start:end],
+            type_filling=self.columns['type_filling'][start:end],
+            position=np.where(positions != 0, positions, np.nan))
+
+        df = pd.DataFrame(
+            data={name: values for name, values in data.items() if self.detailed or not name in REQUEST_COLUMNS},
+            index=self._times(self.columns['time'][start:end]))
+
+        if self.traced:
+            traces = {column: np.where(self.columns[column][start:end] != 0, self.columns[column][start:end], NAT)
+                      for column in TRACE_COLUMNS}
+
+            for column, times in traces.items():
+                df[column] = self._times(times)
+            df['bar_frame'] = pd.to_timedelta(self.columns['bar_frame'][start:end], unit='ns')
+
+            for stage, (first, last) in TRACE_STAGES.items():
+                df[stage] = df[last].to_numpy() - df[first].to_numpy()
+
+        return df
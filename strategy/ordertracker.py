@@ -0,0 +1,47 @@
+import logging
+from datetime import timedelta
+from time import monotonic, sleep
+
+import MetaTrader5 as mt5
+
+from strategy.mt5_client import MT5Client
+
+
+class OrderTracker:
+    def __init__(self, client: MT5Client, timeout: timedelta = timedelta(seconds=5),
+                 interval: timedelta = timedelta(milliseconds=10), maxinterval: timedelta = timedelta(milliseconds=500)):
+        self.client = client
+        self.timeout = timeout.total_seconds()
+        self.interval = interval.total_seconds()
+        self.maxinterval = maxinterval.total_seconds()
+
+    def wait(self, result: dict[any, any]) -> bool:
+        if not result or result.get('retcode') != mt5.TRADE_RETCODE_DONE:
+            logging.error(f'Order not sent, nothing to confirm. {result}')
+            return False
+
+        order = result.get('order')
+        if not order:
+            logging.error(f'Order without ticket, nothing to confirm. {result}')
+            return False
+
+        start = monotonic()
+        interval = self.interval
+
+        while True:
+            status, deals = self.client.get_deals(order)
+            elapsed = monotonic() - start
+
+            if status == mt5.RES_S_OK and not deals.empty:
+                logging.info(
+                    f'Order confirmed {dict(order=order, deals=len(deals), elapsed=elapsed)}')
+                return True
+
+            if elapsed >= self.timeout:
+                logging.error(
+                    f'Order confirmation timeout {dict(order=order, status=status, elapsed=elapsed)}')
+                return False
+
+            # backoff adaptativo: consultas rapidas logo apos o envio, depois mais espacadas
+            sleep(min(interval, self.timeout - elapsed))
+            interval = min(interval * 2, self.maxinterval)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+
+class LastQuote:
+    def __init__(self, columns: list[str] = ['bid', 'ask', 'last']):
+        self.columns = columns
+        self.time = None
+        self.values = {column: float(0) for column in columns}
+        self.times = {column: None for column in columns}
+
+    def update(self, ticks: pd.DataFrame):
+        if ticks.empty:
+            return
+
+        # apenas os ticks ainda nao vistos, ticks ja processados sao ignorados
+        if self.time is not None:
+            ticks = ticks.iloc[ticks.index.searchsorted(self.time, side='right'):]
+            if ticks.empty:
+                return
+
+        for column in self.columns:
+            valid = np.flatnonzero(ticks[column].to_numpy())
+            if len(valid):
+                self.values[column] = float(ticks[column].iat[valid[-1]])
+                self.times[column] = ticks.index[valid[-1]]
+
+        self.time = ticks.index[-1]
+
+    def get(self, column: str, since: pd.Timestamp = None) -> float:
+        time = self.times[column]
+
+        if time is None or (since is not None and time < since):
+            return float(0)
+
+        return self.values[column]
+
+    def reset(self):
+        self.time = None
+        self.values = {column: float(0) for column in self.columns}
+        self.times = {column: None for column in self.columns}
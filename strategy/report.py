@@ -0,0 +1,87 @@
+import logging
+import os
+from datetime import timedelta
+from time import monotonic
+
+import numpy as np
+
+from backtesting.metrics import Metrics
+from strategy import Side
+from strategy.orderledger import OrderLedger
+
+
+class TradeReport:
+    def __init__(self, filename: str, interval: timedelta = timedelta(seconds=30), count: int = 100,
+                 buy: int = Side.BUY.value, sell: int = Side.SELL.value):
+        self.filename = filename
+        self.interval = interval.total_seconds()
+        self.count = count
+        self.buy = buy
+        self.sell = sell
+
+        self.written = 0
+        self.processed = 0
+        self.pending = []
+        self.metrics = Metrics()
+        self.flushed = monotonic()
+        self._open = None
+
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def _profit(self, kind: int, price: float, position: int, time: int) -> float:
+        profit = float(0)
+
+        if self._open is not None:
+            openkind, openprice, opentime = self._open
+            if openkind == self.buy:
+                profit = price - openprice
+            elif openkind == self.sell:
+                profit = openprice - price
+
+            # cada operacao fechada entra nas mesmas metricas do backtesting
+            self.metrics.update(profit, opentime, time)
+
+        # ordem com ticket fecha a posicao, a proxima ordem abre sem lucro
+        self._open = None if position > 0 else (kind, price, time)
+
+        return profit
+
+    def update(self, requests: OrderLedger):
+        kinds, prices, positions, times = requests['type'], requests['price'], requests['position'], requests['time']
+
+        for k in range(self.processed, len(requests)):
+            profit = self._profit(int(kinds[k]), float(prices[k]), int(positions[k]), int(times[k]))
+            self.pending.append((profit, self.metrics.balance))
+
+        self.processed = len(requests)
+
+        pending = self.processed - self.written
+        if pending >= self.count or (pending and monotonic() - self.flushed >= self.interval):
+            self.flush(requests)
+
+    def flush(self, requests: OrderLedger):
+        self.flushed = monotonic()
+
+        if self.written == self.processed:
+            return
+
+        # apenas as ordens novas sao anexadas ao arquivo
+        rows = requests.todataframe(self.written, self.processed)
+        profits = np.array(self.pending)
+        rows['profit'] = profits[:, 0]
+        rows['cumsum_profit'] = profits[:, 1]
+
+        rows.to_csv(self.filename, sep='\t', mode='a', header=not self.written)
+
+        logging.info(
+            f'Trades report flushed {dict(rows=len(rows), total=self.processed, cumsum_profit=self.metrics.balance)}')
+
+        self.written = self.processed
+        self.pending = []
+
+    def close(self, requests: OrderLedger):
+        self.update(requests)
+        self.flush(requests)
+
+        logging.info(f'Trades metrics {self.metrics.summary()}')
@@ -0,0 +1,135 @@
+import logging
+from datetime import datetime, timedelta
+from time import monotonic, sleep
+
+import pytz
+
+from strategy.latency import Latency
+from strategy.mt5_client import MT5Client
+from strategy.tickfeed import TickFeed
+
+
+class Scheduler:
+    def __init__(self, client: MT5Client, capacity: int = 500000, interval: timedelta = timedelta(seconds=1)):
+        self.client = client
+        self.capacity = capacity
+        self.interval = interval.total_seconds()
+        self.strategies = []
+        self.feeds: dict[str, TickFeed] = {}
+        self.lookbacks: dict[str, timedelta] = {}
+        self.barcache = {}
+        self.latency = Latency(filename='latency-scheduler.json')
+
+    def add(self, strategy):
+        if strategy.simulate['simulation']:
+            raise Exception('Invalid arg: strategy.')
+
+        symbols = self._symbols(strategy)
+
+        for symbol in symbols:
+            if not symbol in self.feeds:
+                self.feeds[symbol] = TickFeed(self.client, symbol, self.capacity)
+            self.lookbacks[symbol] = max(self.lookbacks.get(symbol, timedelta(0)), strategy.offset)
+
+        # um feed por simbolo, uma sessao e um cache de barras para todas as estrategias,
+        # os feeds crescem ate o maior lookback entre as estrategias de cada simbolo
+        strategy.client = self.client
+        strategy.feed = self.feeds[strategy.symbol]
+        strategy.feeds = {symbol: self.feeds[symbol] for symbol in symbols}
+        strategy.barcache = self.barcache
+        strategy.latency = Latency(filename=f'latency-{strategy.symbol}-{len(self.strategies)}.json')
+        self.strategies.append(strategy)
+
+    def _symbols(self, strategy) -> list[str]:
+        # o simbolo operado vem sempre primeiro
+        symbols = getattr(strategy, 'symbols', [])
+
+        return [strategy.symbol, *(symbol for symbol in symbols if symbol != strategy.symbol)]
+
+    def _loadsymbols(self) -> set[str]:
+        infos = {}
+
+        for strategy in self.strategies:
+            if not strategy.symbol in infos:
+                infos[strategy.symbol] = strategy.symbol_info if strategy._loadsymbol() else None
+            strategy.symbol_info = infos[strategy.symbol]
+
+        # simbolos auxiliares tambem precisam estar selecionados antes do get_ticks
+        for symbol in self.feeds:
+            if not symbol in infos:
+                infos[symbol] = self.client.select_symbol(symbol)
+
+        return {symbol for symbol, info in infos.items() if info is not None}
+
+    def _loadticks(self, now: datetime, loaded: set[str]) -> set[str]:
+        updated = set()
+
+        for symbol, feed in self.feeds.items():
+            if not symbol in loaded:
+                continue
+
+            count = feed.update(now - self.lookbacks[symbol], now + timedelta(seconds=5))
+
+            if count < 0:
+                logging.warning(f'No data... {dict(symbol=symbol)}')
+            elif count > 0:
+                updated.add(symbol)
+
+        for key in [key for key in self.barcache if key[0] in updated]:
+            del self.barcache[key]
+
+        return updated
+
+    def exec(self):
+        with self.latency.measure('exec'):
+            self._exec()
+
+        self.latency.report()
+
+    def _exec(self):
+        with self.latency.measure('connect'):
+            self.client.connect()
+
+        logging.info('Loading symbols...')
+        with self.latency.measure('loadsymbol'):
+            loaded = self._loadsymbols()
+
+        logging.info('Loading ticks...')
+        now = datetime.now().replace(tzinfo=pytz.utc)
+        with self.latency.measure('loadticks'):
+            updated = self._loadticks(now, loaded)
+
+        for strategy in self.strategies:
+            symbols = list(strategy.feeds)
+
+            # so recalcula quando algum simbolo da estrategia recebeu ticks
+            if not strategy.symbol in loaded or not updated.intersection(symbols):
+                continue
+
+            strategy.windows = {symbol: feed.window(now - strategy.offset)
+                                for symbol, feed in strategy.feeds.items()}
+            strategy.ticks = strategy.windows[strategy.symbol]
+            strategy.quote.update(strategy.ticks)
+
+            if strategy.ticks.empty:
+                continue
+
+            logging.info(f'Running strategy {dict(symbol=strategy.symbol, symbols=symbols)}')
+            strategy.step()
+            strategy.latency.report()
+
+    def run(self):
+        while True:
+            start = monotonic()
+
+            try:
+                logging.info('Running scheduler...')
+                self.exec()
+                logging.info('Scheduler executed...')
+            except KeyboardInterrupt:
+                logging.error('Requested stop', exc_info=True)
+                quit()
+            except Exception:
+                logging.error('Unknown error', exc_info=True)
+
+            sleep(max(self.interval - (monotonic() - start), 0))
@@ -0,0 +1,160 @@
+import logging
+from datetime import datetime
+
+import MetaTrader5 as mt5
+import numpy as np
+import pandas as pd
+import pytz
+
+from strategy.latency import localtime
+from strategy.mt5_client import MT5Client
+
+MILLISECOND = 10 ** 6
+
+TICK_DTYPES = dict(bid=np.float64, ask=np.float64, last=np.float64,
+                   volume=np.uint64, flags=np.uint32, volume_real=np.float64)
+
+
+class TickFeed:
+    def __init__(self, client: MT5Client, symbol: str, capacity: int = 500000,
+                 columns: list[str] = list(TICK_DTYPES)):
+        self.client = client
+        self.symbol = symbol
+        self.capacity = capacity
+        self.count = 0
+        self.lastms = None
+        self.lastcount = 0
+        self.received = 0
+        self.cache = None
+        self.cachekey = None
+
+        # cada tick e gravado duas vezes, a janela e sempre uma fatia continua
+        self.times = np.zeros(capacity * 2, dtype=np.int64)
+        self.columns = {column: np.zeros(capacity * 2, dtype=TICK_DTYPES.get(column, np.float64))
+                        for column in columns}
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def _grow(self, capacity: int):
+        logging.info(f'Tick feed grow {dict(symbol=self.symbol, capacity=capacity)}')
+
+        size = len(self)
+        head = self.count % self.capacity + self.capacity
+        positions = (self.count - size + np.arange(size)) % capacity
+
+        def grow(buffer: np.ndarray) -> np.ndarray:
+            grown = np.zeros(capacity * 2, dtype=buffer.dtype)
+            grown[positions] = buffer[head - size:head]
+            grown[positions + capacity] = buffer[head - size:head]
+            return grown
+
+        self.times = grow(self.times)
+        self.columns = {name: grow(column) for name, column in self.columns.items()}
+        self.capacity = capacity
+        self.cachekey = None
+
+    def _push(self, times: np.ndarray, arrays: dict[str, np.ndarray]):
+        if len(times) > self.capacity:
+            logging.warning(
+                f'Tick feed overflow {dict(ticks=len(times), capacity=self.capacity)}')
+            self.count += len(times) - self.capacity
+            times = times[-self.capacity:]
+            arrays = {name: array[-self.capacity:] for name, array in arrays.items()}
+
+        positions = (self.count + np.arange(len(times))) % self.capacity
+
+        for buffer, array in [(self.times, times), *((self.columns[name], arrays[name]) for name in self.columns)]:
+            buffer[positions] = array
+            buffer[positions + self.capacity] = array
+
+        self.count += len(times)
+
+    def _dedupe(self, ms: np.ndarray) -> int:
+        if self.lastms is None:
+            return 0
+
+        # descarta os ticks ja vistos, inclusive os do mesmo milissegundo
+        start = np.searchsorted(ms, self.lastms, side='left')
+        end = np.searchsorted(ms, self.lastms, side='right')
+
+        return start + min(self.lastcount, end - start)
+
+    def update(self, startdate: datetime, enddate: datetime) -> int:
+        lookback = startdate
+
+        if self.lastms is not None:
+            startdate = max(startdate, datetime.fromtimestamp(
+                self.lastms / 1000, tz=pytz.utc))
+
+        status, ticks = self.client.get_ticks(
+            self.symbol, startdate, enddate, mt5.COPY_TICKS_ALL)
+
+        if status != mt5.RES_S_OK:
+            return -1
+
+        if ticks.empty:
+            return 0
+
+        times = ticks.index.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        ms = times // MILLISECOND
+        skip = self._dedupe(ms)
+
+        if ms[-1] != self.lastms:
+            self.lastcount = 0
+        self.lastms = ms[-1]
+        self.lastcount = max(self.lastcount, int((ms == self.lastms).sum()))
+
+        # o buffer cresce ate caber todo o lookback, a capacidade e so a inicial
+        start, head = self._slice(lookback)
+        needed = head - start + len(times) - skip
+        if needed > self.capacity:
+            self._grow(max(needed, self.capacity * 2))
+
+        self._push(times[skip:], {name: ticks[name].to_numpy(dtype=self.columns[name].dtype)[skip:]
+                                  for name in self.columns})
+
+        # hora local em que o ultimo tick novo chegou
+        if len(times) > skip:
+            self.received = localtime()
+
+        return len(times) - skip
+
+    def _slice(self, startdate: datetime = None) -> tuple[int, int]:
+        size = len(self)
+        head = self.count % self.capacity + self.capacity
+
+        start = head - size
+        if startdate is not None:
+            skip = np.searchsorted(self.times[start:head], pd.Timestamp(startdate).value, side='left')
+
+            if not skip and self.count > self.capacity:
+                logging.warning(
+                    f'Tick feed truncated {dict(symbol=self.symbol, startdate=startdate, capacity=self.capacity)}')
+
+            start += skip
+
+        return start, head
+
+    def arrays(self, startdate: datetime = None) -> dict[str, np.ndarray]:
+        # fatias sem copia, validas ate o proximo update
+        start, head = self._slice(startdate)
+
+        return dict(time=self.times[start:head],
+                    **{name: column[start:head] for name, column in self.columns.items()})
+
+    def window(self, startdate: datetime = None) -> pd.DataFrame:
+        start, head = self._slice(startdate)
+
+        # so reconstroi o frame quando chegam ticks novos ou a janela anda
+        key = (self.count, head - start)
+        if self.cachekey == key:
+            return self.cache
+
+        index = pd.DatetimeIndex(self.times[start:head].view('datetime64[ns]')).tz_localize(pytz.utc)
+
+        self.cache = pd.DataFrame({name: column[start:head] for name, column in self.columns.items()},
+                                  index=index, copy=False)
+        self.cachekey = key
+
+        return self.cache